@@ -1,177 +1,673 @@
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright
 from datetime import datetime
+import asyncio
 import re
+from bisect import bisect_left, insort
 import csv
+import hashlib
+import math
 import os
+import numpy as np
+import pandas as pd
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
 OUTPUT_CSV = "classic_listings.csv"
 
+# Columnar copy of the dedupe columns, reloaded instead of parsing the CSV (needs pyarrow)
+DEDUPE_PARQUET = "classic_listings.parquet"
+
+# search query will be updated based on the make, model etc
+SEARCH_URL = "https://www.classic.com/search/?filters[make]=4&filters[model]=70&q=Ferrari+430+Coupe+Manual+2004+-+2009&result_type=listings"
+
+CSV_FIELDS = [
+    "Make", "Model", "Production Year", "Date of Sale", "Sold Price",
+    "Gearbox", "Description", "Auction House", "Country of Sale", "Spyder", "LHD_RHD"
+]
+
+# Columns that decide whether a listing is already in the CSV
+DEDUPE_FIELDS = ["Make", "Model", "Date of Sale", "Sold Price"]
+
+# Prices within this percentage of each other count as the same sale
+PRICE_TOLERANCE_PERCENT = 5
+
+# Detail pages scraped at the same time (one long-lived page per worker)
+DEFAULT_CONCURRENCY = 8
+
+# Detail pages a worker's browser context serves before it is replaced
+DEFAULT_ROTATE_EVERY = 25
+
+# Rows written to the CSV between flushes
+CSV_FLUSH_EVERY = 20
+
+# Resource types the scraper never needs; aborted when block_assets is on
+BLOCKED_RESOURCE_TYPES = {"image", "font", "stylesheet", "media"}
+
+# Headers for fetching search pages without a browser
+SEARCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml"
+}
+
+# Timeout for the raw HTTP fetch of a listing's history tab (ms)
+HISTORY_TIMEOUT = 15000
+
+# Bloom filter in front of the duplicate index: headroom over the loaded rows and target false-positive rate
+BLOOM_CAPACITY_FACTOR = 10
+BLOOM_FP_RATE = 0.001
+# Rows a run is expected to add when the caller doesn't say (a search page holds far fewer)
+BLOOM_EXPECTED_NEW_ROWS = 500
+
+# Patterns used on every listing, compiled once
+_PRICE_RE = re.compile(r"[^\d]")
+_TITLE_RE = re.compile(r"(\d{4}) (.+?) (.+)")
+
+# Bound str.format of the GBP price string, looked up once
+_format_gbp = "£{:,}".format
+
 # Helper: Currency conversion (placeholder)
-def convert_usd_to_gbp(usd_price: float) -> str:
-    conversion_rate = 0.76  # Example fixed rate
-    gbp_price = usd_price * conversion_rate
-    return f"£{int(gbp_price):,}"
+def convert_usd_to_gbp(usd_price: float, conversion_rate: float = 0.76) -> str:
+    return _format_gbp(int(usd_price * conversion_rate))
 
 # Helper: Normalize price for duplicate check
 def normalize_price(price_str):
-    return int(re.sub(r"[^\d]", "", price_str))
-
-# Load existing entries to check for duplicates
-existing_entries = []
-if os.path.exists(OUTPUT_CSV):
-    with open(OUTPUT_CSV, "r", newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            existing_entries.append(row)
-
-def is_duplicate(new_row):
-    new_price = normalize_price(new_row["Sold Price"])
-    for existing in existing_entries:
-        existing_price = normalize_price(existing["Sold Price"])
-        if (
-            new_row["Make"] == existing["Make"] and
-            new_row["Model"] == existing["Model"] and
-            new_row["Date of Sale"] == existing["Date of Sale"] and
-            abs(existing_price - new_price) / new_price <= 0.05  # allow ±5%
-        ):
-            return True
-    return False
-
-with sync_playwright() as p:
-    browser = p.chromium.launch(headless=False)
-    context = browser.new_context()
-    main_page = context.new_page()
-
-    # STEP 1: Get links and gearbox info
-    main_page.goto("https://www.classic.com/search/?filters[make]=4&filters[model]=70&q=Ferrari+430+Coupe+Manual+2004+-+2009&result_type=listings", timeout=60000) # search query will be updated based on the make, model etc 
-    main_page.wait_for_selector("#dealer-listings-table")
-
-    listings = main_page.query_selector_all("#dealer-listings-table > div.group")
-    print(f"Found {len(listings)} listings\n")
+    return int(_PRICE_RE.sub("", price_str))
+
+# Helper: Integer price range treated as "the same price" (±PRICE_TOLERANCE_PERCENT, bounds inclusive)
+def price_bounds(price):
+    lo = -(-price * (100 - PRICE_TOLERANCE_PERCENT) // 100)  # ceil without floats
+    hi = price * (100 + PRICE_TOLERANCE_PERCENT) // 100
+    return lo, hi
+
+# Load existing entries to check for duplicates (only the columns the dedupe needs)
+def load_existing_entries(path=OUTPUT_CSV, parquet_path=DEDUPE_PARQUET):
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=DEDUPE_FIELDS, dtype="string")
+
+    # The sidecar is only trusted if nothing touched the CSV after it was written
+    if (
+        pyarrow is not None and os.path.exists(parquet_path)
+        and os.path.getmtime(parquet_path) >= os.path.getmtime(path)
+    ):
+        return pd.read_parquet(parquet_path, columns=DEDUPE_FIELDS, engine="pyarrow")
+
+    return pd.read_csv(
+        path,
+        usecols=DEDUPE_FIELDS,
+        dtype={field: "string" for field in DEDUPE_FIELDS},
+        keep_default_na=False
+    )
+
+def save_dedupe_sidecar(existing, new_data, parquet_path=DEDUPE_PARQUET):
+    """Write the dedupe columns of the existing + new rows to the Parquet sidecar"""
+    if pyarrow is None:
+        return
+    new_df = pd.DataFrame(new_data, columns=DEDUPE_FIELDS).astype("string")
+    df_all = pd.concat([existing, new_df], ignore_index=True)
+    df_all.to_parquet(parquet_path, engine="pyarrow", compression="zstd", index=False)
+
+class StreamingCsvWriter:
+    """
+    Appends rows to a CSV as they are scraped, so a crash keeps everything
+    written so far. The file is opened on the first row; the header is
+    written only if the file is empty.
+    """
 
+    def __init__(self, path, fieldnames=CSV_FIELDS, flush_every=CSV_FLUSH_EVERY):
+        self.path = path
+        self.fieldnames = fieldnames
+        self.flush_every = flush_every
+        self.rows_written = 0
+        self._file = None
+        self._writer = None
+        self._closed = False
+
+    def write(self, row):
+        if self._closed:
+            raise ValueError(f"write to closed StreamingCsvWriter ({self.path})")
+        if self._file is None:
+            self._file = open(self.path, "a", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+            if self._file.tell() == 0:
+                self._writer.writeheader()
+        self._writer.writerow(row)
+        self.rows_written += 1
+        if self.rows_written % self.flush_every == 0:
+            self._file.flush()
+
+    def close(self):
+        self._closed = True
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings. A miss means the key was never added;
+    a hit only means it probably was.
+    """
+
+    def __init__(self, capacity, fp_rate=BLOOM_FP_RATE):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        payload = key.encode("utf-8")
+        if xxhash is not None:
+            digest = xxhash.xxh3_128_digest(payload)
+        else:
+            digest = hashlib.blake2b(payload, digest_size=16).digest()
+        # Double hashing: k positions from two 64-bit halves of one digest
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+class DuplicateIndex:
+    """
+    Existing rows sharded by Make, then bucketed by (Model, Date of Sale), each
+    bucket holding sorted prices, so a duplicate check is two dict lookups plus a
+    bisect. A Bloom filter on make|model|date answers most new rows without them.
+    Shards are built on the first lookup of their Make, so a run scraping one
+    make never builds buckets for the rest of the CSV.
+    """
+
+    def __init__(self, existing=None, expected_new_rows=None):
+        """
+        existing: DataFrame with the DEDUPE_FIELDS columns, as from load_existing_entries()
+        expected_new_rows: rows this run may add(), so the Bloom filter is sized for them too
+        """
+        if existing is None:
+            existing = pd.DataFrame(columns=DEDUPE_FIELDS, dtype="string")
+        if expected_new_rows is None:
+            expected_new_rows = BLOOM_EXPECTED_NEW_ROWS
+        self._bloom = BloomFilter(len(existing) * BLOOM_CAPACITY_FACTOR + expected_new_rows)
+        bloom_keys = existing["Make"] + "|" + existing["Model"] + "|" + existing["Date of Sale"]
+        for key in bloom_keys.unique():
+            self._bloom.add(key)
+
+        self._shards = {}
+        self._unbuilt = {make: rows for make, rows in existing.groupby("Make", sort=False)}
+
+    @staticmethod
+    def _build_shard(rows):
+        """Normalize, sort and bucket one Make's prices in a vectorized pass; rows without a price are skipped"""
+        digits = rows["Sold Price"].astype("string").str.replace(_PRICE_RE.pattern, "", regex=True)
+        prices = pd.to_numeric(digits, errors="coerce").dropna().astype(np.int64)
+        frame = rows.loc[prices.index, ["Model", "Date of Sale"]].assign(price=prices)
+        frame = frame.sort_values("price", kind="stable")
+        buckets = frame.groupby(["Model", "Date of Sale"], sort=False)["price"].agg(list)
+        return dict(zip(buckets.index, buckets))
+
+    def _shard(self, make, create=False):
+        shard = self._shards.get(make)
+        if shard is None:
+            rows = self._unbuilt.get(make)
+            if rows is not None:
+                shard = self._shards[make] = self._build_shard(rows)
+                del self._unbuilt[make]
+            elif create:
+                shard = self._shards[make] = {}
+        return shard
+
+    def add(self, row):
+        make, model, date = row["Make"], row["Model"], row["Date of Sale"]
+        self._bloom.add(f"{make}|{model}|{date}")
+        shard = self._shard(make, create=True)
+        insort(shard.setdefault((model, date), []), normalize_price(row["Sold Price"]))
+
+    def is_duplicate(self, new_row):
+        make, model, date = new_row["Make"], new_row["Model"], new_row["Date of Sale"]
+        # Price is left out of the Bloom key so the price tolerance can't cause a false "unique"
+        if f"{make}|{model}|{date}" not in self._bloom:
+            return False
+        shard = self._shard(make)
+        prices = shard.get((model, date)) if shard else None
+        if not prices:
+            return False
+        lo, hi = price_bounds(normalize_price(new_row["Sold Price"]))
+        # Any existing price within the bounds is a duplicate
+        i = bisect_left(prices, lo)
+        return i < len(prices) and prices[i] <= hi
+
+async def _block_assets(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def new_scraper_context(browser, block_assets=True, storage_state=None):
+    context = await browser.new_context(storage_state=storage_state)
+    if block_assets:
+        await context.route("**/*", _block_assets)
+    return context
+
+# Reads link, gearbox and LHD/RHD text for every search result in one browser round-trip
+_LISTINGS_JS = r"""
+listings => listings.map(el => {
+    const anchor = el.querySelector('a');
+    const gearbox = el.querySelector(
+        'div.flex.flex-wrap.justify-between.text-gray-500.table\\:justify-start.table\\:gap-x-3.table\\:gap-y-1 > div:nth-child(2)'
+    );
+    const divs = [...el.querySelectorAll('div.flex.items-center')];
+    const lhdRhd = divs.length >= 3 ? divs[2] : divs[1];
+    return {
+        href: anchor ? anchor.getAttribute('href') : null,
+        gearbox: gearbox ? gearbox.innerText.trim() : null,
+        lhdRhd: lhdRhd ? lhdRhd.innerText.trim() : null
+    };
+})
+"""
+
+def _listing_items(listings, max_listings=None):
     results = []
-    for listing in listings:
-        anchor = listing.query_selector("a")
-        href = anchor.get_attribute("href") if anchor else None
-        gearbox = None
-        og_gearbox = "Unknown"
-        gearbox_divs = listing.query_selector_all("div.flex.items-center")
-        
-        try:
-            gearbox_element = listing.query_selector(
-                "div.flex.flex-wrap.justify-between.text-gray-500.table\\:justify-start.table\\:gap-x-3.table\\:gap-y-1 > div:nth-child(2)"
-            )
-            if gearbox_element:
-                og_gearbox = gearbox_element.inner_text().strip()
-        except:
-            pass
-        
-        
-        LHD_RHD= "Unknown"
-        if len(gearbox_divs) >= 3:
-            gearbox = gearbox_divs[1].inner_text().strip()
-            LHD_RHD = gearbox_divs[2].inner_text().strip() if len(gearbox_divs) > 2 else "Unknown"
-            
-        if len(gearbox_divs) >= 2:
-            gearbox = "Unknown"
-            LHD_RHD = gearbox_divs[1].inner_text().strip()
-        if href:
+    for listing in listings[:max_listings]:
+        if listing["href"]:
             results.append({
-                "url": "https://www.classic.com" + href,
-                "country": gearbox or "Unknown",
-                "gearbox": og_gearbox
+                "url": "https://www.classic.com" + listing["href"],
+                "gearbox": listing["gearbox"] or "Unknown",
+                "lhd_rhd": listing["lhdRhd"] or "Unknown"
             })
+    return results
 
-    # STEP 2: Scrape each listing
-    new_data = []
-    for item in results:
-        page = context.new_page()
-        page.goto(item['url'])
-        print(f"\n🔗 Scraping: {item['url']}")
+def parse_listings(html):
+    """Same fields as _LISTINGS_JS, parsed from the search page's static HTML"""
+    listings = []
+    for node in HTMLParser(html).css("#dealer-listings-table > div.group"):
+        anchor = node.css_first("a")
+        gearbox = node.css_first(
+            "div.flex.flex-wrap.justify-between.text-gray-500"
+            "[class~='table:justify-start'][class~='table:gap-x-3'][class~='table:gap-y-1'] > div:nth-child(2)"
+        )
+        divs = node.css("div.flex.items-center")
+        lhd_rhd = divs[2] if len(divs) >= 3 else divs[1] if len(divs) >= 2 else None
+        listings.append({
+            "href": anchor.attributes.get("href") if anchor else None,
+            "gearbox": gearbox.text(separator=" ", strip=True) if gearbox else None,
+            "lhdRhd": lhd_rhd.text(separator=" ", strip=True) if lhd_rhd else None
+        })
+    return listings
+
+# STEP 1a: Get links and gearbox info from the search page's HTML, no browser needed
+async def fetch_listings(search_url, max_listings=None, timeout=60000):
+    """Returns [] when the page can't be fetched or has no static listings, so the caller can fall back to the browser"""
+    if httpx is None or HTMLParser is None:
+        return []
+    try:
+        async with httpx.AsyncClient(headers=SEARCH_HEADERS, follow_redirects=True, timeout=timeout / 1000) as client:
+            response = await client.get(search_url)
+            response.raise_for_status()
+    except httpx.HTTPError as e:
+        print(f"⚠️ Could not fetch search page over HTTP ({e}), using the browser")
+        return []
+
+    listings = parse_listings(response.text)
+    if listings:
+        print(f"Found {len(listings)} listings\n")
+    return _listing_items(listings, max_listings)
+
+# STEP 1b: Get links and gearbox info from the search page in the browser
+async def collect_listings(page, search_url, max_listings=None, timeout=60000):
+    await page.goto(search_url, timeout=timeout, wait_until="domcontentloaded")
+    await page.wait_for_selector("#dealer-listings-table")
+
+    listings = await page.eval_on_selector_all("#dealer-listings-table > div.group", _LISTINGS_JS)
+    print(f"Found {len(listings)} listings\n")
+    return _listing_items(listings, max_listings)
+
+# Reads every detail-page field in one browser round-trip. Without selectolax the
+# history tab is fetched and parsed in the page rather than navigated to.
+_DETAIL_JS = r"""
+async ({url, fetchHistory}) => {
+    const MONTH = /\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)/;
+    const SALE_DATE = /\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},\s*\d{4}\b/;
+
+    // Text of the innermost element whose own text matches, like Playwright's text= selector
+    const firstTextMatch = (pattern) => {
+        const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+        for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+            if (pattern.test(node.textContent)) return node.parentElement.innerText;
+        }
+        return null;
+    };
+
+    let auctionHouse = null;
+    if (fetchHistory) try {
+        const html = await (await fetch(url + '?tab=history')).text();
+        const history = new DOMParser().parseFromString(html, 'text/html');
+        const block = history.querySelector('div.flex.flex-col.border-l-\\[1px\\]');
+        const auctionLink = block ? block.querySelector('a') : null;
+        const sellerTag = history.querySelector("a[href*='/dealer/']");
+        const source = sellerTag || auctionLink;
+        auctionHouse = source ? source.textContent.trim() : null;
+    } catch (e) {}
+
+    // Known nodes first; the text scan is only a fallback for pages without them
+    const priceNode = document.querySelector("[data-testid*='price'], .price");
+    const timeNode = document.querySelector('time[datetime]');
+    const priceText = priceNode ? priceNode.innerText : firstTextMatch(/\$\s*\d/);
+    // A month name may sit in its own text node, so match the full date on the parent's text
+    let dateMatch = null;
+    if (!timeNode) {
+        const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+        for (let node = walker.nextNode(); node && !dateMatch; node = walker.nextNode()) {
+            if (MONTH.test(node.textContent)) dateMatch = node.parentElement.innerText.match(SALE_DATE);
+        }
+    }
+
+    const h1 = document.querySelector('h1');
+    return {
+        title: h1 ? h1.innerText.trim() : null,
+        priceText: priceText,
+        dateIso: timeNode ? timeNode.getAttribute('datetime') : null,
+        dateText: dateMatch ? dateMatch[0] : null,
+        auctionHouse: auctionHouse
+    };
+}
+"""
+
+def parse_auction_house(html):
+    """Seller or auction house from a listing's history tab HTML"""
+    tree = HTMLParser(html)
+    seller_tag = tree.css_first("a[href*='/dealer/']")
+    if seller_tag:
+        return seller_tag.text(strip=True)
+    # selectolax can't parse the escaped class name, so match it as an attribute word
+    history_block = tree.css_first("div.flex.flex-col[class~='border-l-[1px]']")
+    auction_link = history_block.css_first("a") if history_block else None
+    return auction_link.text(strip=True) if auction_link else None
+
+async def fetch_auction_house(context, url):
+    """Fetch the history tab over plain HTTP (sharing the context's cookies) instead of navigating"""
+    try:
+        response = await context.request.get(url + "?tab=history", timeout=HISTORY_TIMEOUT)
+        return parse_auction_house(await response.text())
+    except Exception:
+        return None
+
+def parse_sale_date(date_iso, date_text):
+    """dd/mm/YYYY from a <time datetime> value, else from text like 'Jul 4, 2025' or 'July 4, 2025'"""
+    if date_iso:
         try:
-            title = page.query_selector("h1").inner_text().strip()
-            match = re.match(r"(\d{4}) (.+?) (.+)", title)
-            year = match.group(1)
-            make = match.group(2)
-            model = match.group(3)
-
-            # Price
-            price_text = page.query_selector("text=$").inner_text()
-            price_usd = int(re.sub(r"[^\d]", "", price_text))
-            price_gbp = convert_usd_to_gbp(price_usd)
-
-            # Date of sale
-            raw_date = page.locator("text=Jul").nth(0).inner_text().replace('\n', "").strip()
-            sale_date = datetime.strptime(raw_date, "%b %d, %Y").strftime("%d/%m/%Y")
-
-            # Description
-            description = None
-
-            # Auction House
-            auction_house = "Unknown"
+            return datetime.fromisoformat(date_iso[:10]).strftime("%d/%m/%Y")
+        except ValueError:
+            pass
+    if date_text:
+        date_text = " ".join(date_text.split())
+        for date_format in ("%b %d, %Y", "%B %d, %Y"):
             try:
-                page.goto(item['url'] + "?tab=history")
-                page.wait_for_selector("div.tab-item[data-tab='history']")
-                history_blocks = page.query_selector_all("div.flex.flex-col.border-l-\\[1px\\]")
-
-                if len(history_blocks) >= 2:
-                    auction_link_0 = history_blocks[0].query_selector("a")
-                    if auction_link_0:
-                        auction_house = auction_link_0.inner_text().strip()
-                elif len(history_blocks) == 1:
-                    auction_link = history_blocks[0].query_selector("a")
-                    if auction_link:
-                        auction_house = auction_link.inner_text().strip()
-
-                seller_tag = page.query_selector("a[href*='/dealer/']")
-                if seller_tag:
-                    auction_house = seller_tag.inner_text().strip()
+                return datetime.strptime(date_text, date_format).strftime("%d/%m/%Y")
+            except ValueError:
+                pass
+    return "Unknown"
+
+# STEP 2: Scrape one listing's detail page
+async def scrape_listing(page, item, conversion_rate=0.76):
+    await page.goto(item['url'], wait_until="domcontentloaded")
+    data = await page.evaluate(_DETAIL_JS, {"url": item['url'], "fetchHistory": HTMLParser is None})
+
+    match = _TITLE_RE.match(data["title"] or "")
+    if not match:
+        return None
+    year = match.group(1)
+    make = match.group(2)
+    model = match.group(3)
+
+    # Price
+    if not data["priceText"]:
+        return None
+    price_usd = normalize_price(data["priceText"])
+    price_gbp = convert_usd_to_gbp(price_usd, conversion_rate)
+
+    # Date of sale
+    sale_date = parse_sale_date(data["dateIso"], data["dateText"])
+
+    # Auction House
+    if HTMLParser is not None:
+        data["auctionHouse"] = await fetch_auction_house(page.context, item['url'])
+    auction_house = data["auctionHouse"] or "Unknown"
+
+    # Spyder
+    spyder = any(k in model.lower() for k in ['spyder', 'spider'])
+
+    return {
+        "Make": make,
+        "Model": model,
+        "Production Year": year,
+        "Date of Sale": sale_date,
+        "Sold Price": price_gbp,
+        "Gearbox": item["gearbox"],
+        "Description": "",
+        "Auction House": auction_house,
+        "Country of Sale": item["lhd_rhd"],
+        "Spyder": spyder,
+        "LHD_RHD": item["lhd_rhd"]
+    }
+
+class RotatingContext:
+    """
+    A browser context and page that are swapped for fresh ones after every
+    rotate_every detail pages, since long-lived contexts keep growing in memory
+    (more so with request routing). Cookies and local storage carry over through storage_state.
+    """
+
+    def __init__(self, browser, rotate_every=DEFAULT_ROTATE_EVERY, storage_state=None, block_assets=True):
+        self.browser = browser
+        self.rotate_every = rotate_every
+        self.storage_state = storage_state
+        self.block_assets = block_assets
+        self.context = None
+        self.page = None
+        self.pages_done = 0
 
+    async def open(self):
+        self.context = await new_scraper_context(self.browser, self.block_assets, self.storage_state)
+        self.page = await self.context.new_page()
+        return self.page
+
+    async def recycle(self):
+        """Count a finished detail page and rotate the context when due. Returns the page to use next."""
+        self.pages_done += 1
+        if self.rotate_every and self.pages_done >= self.rotate_every:
+            self.storage_state = await self.context.storage_state()
+            await self.context.close()
+            self.pages_done = 0
+            await self.open()
+        return self.page
+
+    async def reopen(self):
+        """Replace a context that failed to rotate; the old one is closed if it still can be"""
+        self.pages_done = 0
+        old, self.context, self.page = self.context, None, None
+        if old:
+            try:
+                await old.close()
             except Exception:
                 pass
+        await self.open()
+
+    async def close(self):
+        if self.context:
+            await self.context.close()
+            self.context = None
+
+async def scrape_listings(browser, items, conversion_rate=0.76, concurrency=DEFAULT_CONCURRENCY,
+                          rotate_every=DEFAULT_ROTATE_EVERY, storage_state=None, block_assets=True,
+                          is_duplicate=None, on_row=None):
+    """
+    Scrape all detail pages concurrently (at most `concurrency` at once), each borrowing
+    a page from a pool of rotating contexts. Rows for which is_duplicate(row) is true are
+    skipped. Accepted rows are passed to on_row(row) as they arrive when it is given,
+    otherwise returned in listing order.
+    """
+    slots = min(concurrency, len(items))
+    if not slots:
+        return []
+
+    # A context is only ever held by one scrape at a time, so rotating it can't close a page in use.
+    # Waiting on idle_contexts is also what caps the scrapes in flight at `slots`.
+    contexts = [RotatingContext(browser, rotate_every, storage_state, block_assets) for _ in range(slots)]
+    idle_contexts = asyncio.Queue()
+    rows_lock = asyncio.Lock()  # guards the duplicate check + hand-off
 
-            # Spyder
-            spyder = any(k in model.lower() for k in ['spyder', 'spider'])
-
-            row = {
-                "Make": make,
-                "Model": model,
-                "Production Year": year,
-                "Date of Sale": sale_date,
-                "Sold Price": price_gbp,
-                "Gearbox": item["gearbox"],
-                "Description": "",
-                "Auction House": auction_house,
-                "Country of Sale": item["country"],
-                "Spyder": spyder,
-                "LHD_RHD": LHD_RHD
-            }
-            
-            
-            print(row)
-
-            if not is_duplicate(row):
-                new_data.append(row)
-            else:
+    async def scrape_one(item):
+        rotating = await idle_contexts.get()
+        try:
+            print(f"🔗 Scraping: {item['url']}")
+            try:
+                row = await scrape_listing(rotating.page, item, conversion_rate)
+            except Exception as e:
+                print(f"❌ Error on {item['url']}: {e}")
+                row = None
+            # A failed rotation costs this context, not the whole run
+            try:
+                await rotating.recycle()
+            except Exception as e:
+                print(f"⚠️ Could not rotate browser context ({e}), opening a new one")
+                try:
+                    await rotating.reopen()
+                except Exception as e:
+                    print(f"❌ Could not reopen browser context: {e}")
+        finally:
+            idle_contexts.put_nowait(rotating)
+
+        if row is None:
+            return None
+        async with rows_lock:
+            if is_duplicate and is_duplicate(row):
                 print("⚠️ Duplicate skipped")
+                return None
+            if on_row:
+                on_row(row)
+                return None
+            return row
+
+    try:
+        await asyncio.gather(*(rotating.open() for rotating in contexts))
+        for rotating in contexts:
+            idle_contexts.put_nowait(rotating)
+        tasks = [asyncio.create_task(scrape_one(item)) for item in items]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # Stop the other scrapes before their contexts are closed below,
+            # so none of them is left calling on_row after the caller has moved on
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+    finally:
+        await asyncio.gather(*(rotating.close() for rotating in contexts), return_exceptions=True)
+
+    return [row for row in results if row is not None]
+
+async def _scrape_with_browser(browser, search_url, options, is_duplicate, on_row):
+    block_assets = options.get('block_assets', True)
+    items = await fetch_listings(
+        search_url,
+        max_listings=options.get('max_listings'),
+        timeout=options.get('timeout', 60000)
+    )
+    storage_state = None
+
+    # Listings rendered by JS (or an HTTP failure) need the browser
+    if not items:
+        context = await new_scraper_context(browser, block_assets)
+        try:
+            main_page = await context.new_page()
+            items = await collect_listings(
+                main_page, search_url,
+                max_listings=options.get('max_listings'),
+                timeout=options.get('timeout', 60000)
+            )
+            # Workers start from the search page's cookies
+            storage_state = await context.storage_state()
+        finally:
+            await context.close()
+
+    return await scrape_listings(
+        browser, items,
+        conversion_rate=options.get('conversion_rate', 0.76),
+        concurrency=options.get('concurrency', DEFAULT_CONCURRENCY),
+        rotate_every=options.get('rotate_every', DEFAULT_ROTATE_EVERY),
+        storage_state=storage_state,
+        block_assets=block_assets,
+        is_duplicate=is_duplicate,
+        on_row=on_row
+    )
+
+async def scrape_classic_com(search_url, options=None, is_duplicate=None, on_row=None, browser=None):
+    """
+    Collect listings from a Classic.com search page and scrape their detail pages.
+    Runs on the given browser (left open afterwards), or launches one just for this run.
+    """
+    options = options or {}
+    if browser is not None:
+        return await _scrape_with_browser(browser, search_url, options, is_duplicate, on_row)
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=options.get('headless', True))
+        try:
+            return await _scrape_with_browser(browser, search_url, options, is_duplicate, on_row)
+        finally:
+            await browser.close()
+
+async def main():
+    existing_entries = load_existing_entries()
+    existing = DuplicateIndex(existing_entries)
+    new_keys = []  # dedupe columns of the rows written this run, for the Parquet sidecar
+
+    # Rows go to the CSV as soon as they pass the duplicate check
+    with StreamingCsvWriter(OUTPUT_CSV) as writer:
+        def save_row(row):
+            writer.write(row)
+            existing.add(row)  # later rows in this run are checked against it too
+            new_keys.append({field: row[field] for field in DEDUPE_FIELDS})
+
+        await scrape_classic_com(
+            SEARCH_URL,
+            {'headless': False},
+            is_duplicate=existing.is_duplicate,
+            on_row=save_row
+        )
 
-        except Exception as e:
-            print(f"❌ Error on {item['url']}: {e}")
-            continue
-
-    # Save to CSV
-    if new_data:
-        write_header = not os.path.exists(OUTPUT_CSV)
-        with open(OUTPUT_CSV, "a", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                "Make", "Model", "Production Year", "Date of Sale", "Sold Price",
-                "Gearbox", "Description", "Auction House", "Country of Sale", "Spyder", "LHD_RHD"
-            ])
-            if write_header:
-                writer.writeheader()
-            writer.writerows(new_data)
-        print(f"\n✅ Saved {len(new_data)} new records to {OUTPUT_CSV}")
+    if new_keys:
+        save_dedupe_sidecar(existing_entries, new_keys)
+        print(f"\n✅ Saved {len(new_keys)} new records to {OUTPUT_CSV}")
     else:
         print("\n✅ No new records to save (all duplicates)")
 
-    browser.close()
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,45 @@
+# dedupe.py
+"""
+Content-hash de-duplication for scraped records.
+Overlapping search pages and re-runs return identical listings; hashing
+each record's content lets a job drop them before they reach the CSV.
+"""
+
+import hashlib
+import json
+from typing import Dict, Iterable, List
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+def record_hash(record: Dict) -> bytes:
+    """Stable 16-byte hash of a record's content (key order doesn't matter)"""
+    payload = json.dumps(record, sort_keys=True, default=str).encode('utf-8')
+    if xxhash is not None:
+        return xxhash.xxh3_128_digest(payload)
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+class RecordDeduper:
+    """Remembers every record hash seen during one job (jobs are a few hundred rows)"""
+
+    def __init__(self):
+        self._seen = set()
+
+    def is_new(self, record: Dict) -> bool:
+        """True the first time a record's content is seen"""
+        digest = record_hash(record)
+        if digest in self._seen:
+            return False
+        self._seen.add(digest)
+        return True
+
+    def filter(self, records: Iterable[Dict]) -> List[Dict]:
+        return [record for record in records if self.is_new(record)]
+
+
+def dedupe_records(records: Iterable[Dict]) -> List[Dict]:
+    """Drop records whose content already appeared earlier in the list"""
+    return RecordDeduper().filter(records)
@@ -0,0 +1,209 @@
+# job_store.py
+"""
+Storage backends for scraping job state.
+Jobs live in process memory by default. Set REDIS_URL to keep them in Redis
+instead so several Uvicorn workers can share the same jobs.
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+# How long a job hash lives in Redis before it is evicted
+JOB_TTL_SECONDS = int(os.environ.get("JOB_TTL_SECONDS", "86400"))
+
+# Redis has no in-process wakeups, so watchers poll the job version this often
+REDIS_POLL_INTERVAL = 1.0
+
+
+class InMemoryJobStore:
+    """
+    Job store backed by a plain dict (single process only).
+    Job dicts are treated as immutable snapshots - update() replaces them.
+    Jobs are kept in least-recently-written order so evict() can drop the
+    oldest finished jobs first.
+    """
+
+    def __init__(self):
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._waiters: Dict[str, list] = {}
+
+    def _notify(self, job_id: str):
+        self._versions[job_id] = self._versions.get(job_id, 0) + 1
+        # Updates may come from worker threads or another loop, so wake watchers via their own loop
+        for loop, event in list(self._waiters.get(job_id, ())):
+            loop.call_soon_threadsafe(event.set)
+
+    async def version(self, job_id: str) -> int:
+        return self._versions.get(job_id, 0)
+
+    async def wait_for_update(self, job_id: str, seen_version: int, timeout: float) -> int:
+        """Wait until the job changes past seen_version or timeout expires. Returns the current version."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        self._waiters.setdefault(job_id, []).append(waiter)
+        try:
+            # Checked after registering so an update between the two can't be missed
+            if self._versions.get(job_id, 0) == seen_version:
+                await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiters = self._waiters.get(job_id, [])
+            waiters.remove(waiter)
+            if not waiters:
+                self._waiters.pop(job_id, None)
+        return self._versions.get(job_id, 0)
+
+    async def create(self, job_id: str, job: Dict):
+        self._jobs[job_id] = dict(job)
+        self._jobs.move_to_end(job_id)
+        self._versions[job_id] = 0
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return self._jobs.get(job_id)
+
+    async def update(self, job_id: str, **fields):
+        job = self._jobs.get(job_id)
+        if job is not None:
+            # Swap in a fresh snapshot instead of mutating in place, so readers on the
+            # event loop never see a half-applied update from a worker thread
+            self._jobs[job_id] = {**job, **fields}
+            self._jobs.move_to_end(job_id)
+            self._notify(job_id)
+
+    async def delete(self, job_id: str) -> bool:
+        deleted = self._jobs.pop(job_id, None) is not None
+        if deleted:
+            self._notify(job_id)
+            self._versions.pop(job_id, None)
+        return deleted
+
+    async def values(self) -> List[Dict]:
+        return list(self._jobs.values())
+
+    async def evict(self, max_jobs: int) -> List[Dict]:
+        """Drop the least recently written finished jobs until at most max_jobs remain"""
+        excess = len(self._jobs) - max_jobs
+        evicted = []
+        if excess <= 0:
+            return evicted
+
+        # Pending/running jobs are never evicted, however old they are
+        for job_id, job in list(self._jobs.items()):
+            if len(evicted) >= excess:
+                break
+            if job['status'] in ('completed', 'failed'):
+                await self.delete(job_id)
+                evicted.append(job)
+        return evicted
+
+    async def exists(self, job_id: str) -> bool:
+        return job_id in self._jobs
+
+    async def count(self) -> int:
+        return len(self._jobs)
+
+
+class RedisJobStore:
+    """
+    Job store backed by one Redis hash per job, each field JSON encoded.
+    Uses the asyncio client so no call blocks the event loop.
+    """
+
+    KEY_PREFIX = "job:"
+    VERSION_FIELD = "_version"
+
+    def __init__(self, url: str, ttl: int = JOB_TTL_SECONDS):
+        self._redis = aioredis.Redis.from_url(url, decode_responses=True)
+        self._ttl = ttl
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.KEY_PREFIX}{job_id}"
+
+    @staticmethod
+    def _encode(fields: Dict) -> Dict[str, str]:
+        return {key: json.dumps(value) for key, value in fields.items()}
+
+    @classmethod
+    def _decode(cls, raw: Dict[str, str]) -> Dict:
+        return {key: json.loads(value) for key, value in raw.items() if key != cls.VERSION_FIELD}
+
+    async def version(self, job_id: str) -> int:
+        return int(await self._redis.hget(self._key(job_id), self.VERSION_FIELD) or 0)
+
+    async def wait_for_update(self, job_id: str, seen_version: int, timeout: float) -> int:
+        """Poll until the job changes past seen_version or timeout expires. Returns the current version."""
+        deadline = time.monotonic() + timeout
+        current = await self.version(job_id)
+        while current == seen_version and time.monotonic() < deadline:
+            await asyncio.sleep(REDIS_POLL_INTERVAL)
+            current = await self.version(job_id)
+        return current
+
+    async def create(self, job_id: str, job: Dict):
+        key = self._key(job_id)
+        async with self._redis.pipeline() as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping={**self._encode(job), self.VERSION_FIELD: 0})
+            pipe.expire(key, self._ttl)
+            await pipe.execute()
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        raw = await self._redis.hgetall(self._key(job_id))
+        return self._decode(raw) if raw else None
+
+    async def update(self, job_id: str, **fields):
+        key = self._key(job_id)
+        # Don't resurrect a job that was deleted or expired mid-run
+        if not fields or not await self._redis.exists(key):
+            return
+        async with self._redis.pipeline() as pipe:
+            pipe.hset(key, mapping=self._encode(fields))
+            pipe.hincrby(key, self.VERSION_FIELD, 1)
+            await pipe.execute()
+
+    async def delete(self, job_id: str) -> bool:
+        return await self._redis.delete(self._key(job_id)) > 0
+
+    async def _job_keys(self) -> List[str]:
+        return [key async for key in self._redis.scan_iter(match=f"{self.KEY_PREFIX}*")]
+
+    async def values(self) -> List[Dict]:
+        keys = await self._job_keys()
+        if not keys:
+            return []
+        # One round-trip for every job hash instead of an hgetall per key
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.hgetall(key)
+            raws = await pipe.execute()
+        return [self._decode(raw) for raw in raws if raw]
+
+    async def evict(self, max_jobs: int) -> List[Dict]:
+        """No-op - Redis bounds memory through the per-job TTL"""
+        return []
+
+    async def exists(self, job_id: str) -> bool:
+        return await self._redis.exists(self._key(job_id)) > 0
+
+    async def count(self) -> int:
+        return len(await self._job_keys())
+
+
+def create_job_store():
+    """Pick the job store backend from the environment"""
+    redis_url = os.environ.get("REDIS_URL")
+    if redis_url:
+        if aioredis is not None:
+            return RedisJobStore(redis_url)
+        print("⚠️ REDIS_URL is set but the redis package is not installed. Using in-memory job store.")
+    return InMemoryJobStore()
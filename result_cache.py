@@ -0,0 +1,84 @@
+# result_cache.py
+"""
+Cache of finished scrape results keyed on scraper type + options.
+Repeated jobs with identical options are answered from here instead of
+re-scraping the target site. Uses Redis when REDIS_URL is set, otherwise
+a per-process dict.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+# Seconds a result stays fresh per scraper; 0 disables caching for that scraper
+RESULT_CACHE_TTL = {
+    'classic_valuer': int(os.environ.get("CLASSIC_VALUER_CACHE_TTL", "3600")),
+    'classic_com': int(os.environ.get("CLASSIC_COM_CACHE_TTL", "1800")),  # auction listings move faster
+}
+
+
+def cache_key(scraper_type: str, options: Dict) -> str:
+    """Stable key for a scraper run - option order doesn't matter"""
+    payload = json.dumps(options or {}, sort_keys=True, default=str) + scraper_type
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """TTL cache of completed job fields; async so the Redis calls never block the event loop"""
+
+    KEY_PREFIX = "result:"
+
+    def __init__(self, redis_url: Optional[str] = None):
+        self._redis = aioredis.Redis.from_url(redis_url, decode_responses=True) if redis_url else None
+        self._entries: Dict[str, tuple] = {}
+
+    async def get(self, scraper_type: str, options: Dict) -> Optional[Dict]:
+        key = cache_key(scraper_type, options)
+        if self._redis is not None:
+            raw = await self._redis.get(self.KEY_PREFIX + key)
+            value = json.loads(raw) if raw else None
+        else:
+            entry = self._entries.get(key)
+            value = None
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at < time.monotonic():
+                    del self._entries[key]
+                    value = None
+
+        # A cached result is useless once its CSV has been deleted
+        if value and value.get('csv_file') and not Path(value['csv_file']).exists():
+            await self.invalidate(scraper_type, options)
+            return None
+        return value
+
+    async def set(self, scraper_type: str, options: Dict, value: Dict):
+        ttl = RESULT_CACHE_TTL.get(scraper_type, 0)
+        if ttl <= 0:
+            return
+        key = cache_key(scraper_type, options)
+        if self._redis is not None:
+            await self._redis.set(self.KEY_PREFIX + key, json.dumps(value), ex=ttl)
+        else:
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    async def invalidate(self, scraper_type: str, options: Dict):
+        key = cache_key(scraper_type, options)
+        if self._redis is not None:
+            await self._redis.delete(self.KEY_PREFIX + key)
+        else:
+            self._entries.pop(key, None)
+
+
+def create_result_cache() -> ResultCache:
+    """Share the job store's Redis when one is configured"""
+    redis_url = os.environ.get("REDIS_URL")
+    return ResultCache(redis_url if redis_url and aioredis is not None else None)
@@ -0,0 +1,47 @@
+import json
+import shutil
+import subprocess
+import unittest
+
+from theclassicvaluer import parse_core
+from theclassicvaluer.playwright_code import PRE_PARSE_JS
+
+NODE = shutil.which("node")
+
+TEXTS = [
+    "27 Jul 2025 2006 Ferrari F430 Coupe Manual Bonhams UK £120,000 - £140,000",
+    "3 Jan 2024 1965 Aston Martin DB5 £650,000.00 sold",
+    "12 Dec 2023 Porsche 911 Carrera 4S USA £85,500",
+    "1 Feb 2025 19301 Mini Cooper S no year match, £ no price",
+    "Jaguar E-Type 1961 Series 1 Estimate £95,000-£110,000",
+    "2029 is out of range, 1929 too, but 1930 counts",
+    "no date, no year, no price",
+    "",
+]
+
+
+def run_pre_parse_js(texts):
+    script = (
+        f"const preParse = {PRE_PARSE_JS};\n"
+        "const texts = JSON.parse(require('fs').readFileSync(0, 'utf8'));\n"
+        "process.stdout.write(JSON.stringify(texts.map(preParse)));\n"
+    )
+    result = subprocess.run(
+        [NODE, "-e", script], input=json.dumps(texts), capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout)
+
+
+@unittest.skipUnless(NODE, "node is not installed")
+class PreParseJsTest(unittest.TestCase):
+    def test_js_matches_python(self):
+        expected = [parse_core._pre_parse(text) for text in TEXTS]
+        self.assertEqual(run_pre_parse_js(TEXTS), expected)
+
+    def test_word_boundaries_survive(self):
+        # \b reached the browser as a backspace when the script was not a raw string
+        self.assertEqual(run_pre_parse_js(["2006 Ferrari F430"])[0]["year"], "2006")
+
+
+if __name__ == "__main__":
+    unittest.main()
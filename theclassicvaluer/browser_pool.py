@@ -0,0 +1,105 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from playwright.async_api import Browser, BrowserContext, Playwright
+
+
+# Chromium flags for long unattended runs (small /dev/shm in containers, no GPU)
+LAUNCH_ARGS = ["--disable-dev-shm-usage", "--disable-gpu", "--no-sandbox"]
+
+
+@dataclass
+class BrowserInstance:
+    """One pooled browser with its single shared context"""
+    browser: Browser
+    context: BrowserContext
+    pages_processed: int = 0
+    active_pages: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class BrowserPool:
+    """
+    Fixed number of browsers shared by the scraping tasks.
+    A browser is replaced once it has served max_pages_per_browser pages, is older
+    than max_age_seconds, or has crashed, so memory stays bounded on long runs.
+    """
+
+    def __init__(self, playwright: Playwright, size: int = 2, pages_per_browser: int = 5,
+                 max_pages_per_browser: int = 50, max_age_seconds: float = 300,
+                 headless: bool = False, context_options: Optional[Dict] = None,
+                 route_handler: Optional[Callable] = None):
+        self.playwright = playwright
+        self.size = size
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_age_seconds = max_age_seconds
+        self.headless = headless
+        self.context_options = context_options or {}
+        self.route_handler = route_handler
+        self.instances: List[BrowserInstance] = []
+        # At most pages_per_browser pages open in each browser at once
+        self._slots = asyncio.Semaphore(size * pages_per_browser)
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        """Launch the initial browsers"""
+        self.instances = list(await asyncio.gather(*(self._launch() for _ in range(self.size))))
+        return self
+
+    async def _launch(self) -> BrowserInstance:
+        browser = await self.playwright.chromium.launch(headless=self.headless, args=LAUNCH_ARGS)
+        context = await browser.new_context(**self.context_options)
+        if self.route_handler:
+            await context.route("**/*", self.route_handler)
+        return BrowserInstance(browser, context)
+
+    def _worn_out(self, instance: BrowserInstance) -> bool:
+        return (instance.pages_processed >= self.max_pages_per_browser
+                or time.monotonic() - instance.created_at > self.max_age_seconds
+                or not instance.browser.is_connected())
+
+    async def _close_instance(self, instance: BrowserInstance):
+        try:
+            await instance.context.close()
+            await instance.browser.close()
+        except Exception as e:
+            print(f"⚠️ Error closing pooled browser: {e}")
+
+    async def _recycle(self, instance: BrowserInstance):
+        """Swap a worn out browser for a fresh one; the old one closes once its last page is done"""
+        self.instances.remove(instance)
+        self.instances.append(await self._launch())
+        if instance.active_pages == 0:
+            await self._close_instance(instance)
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow the least busy browser for one page's worth of work"""
+        async with self._slots:
+            async with self._lock:
+                for instance in [i for i in self.instances if self._worn_out(i)]:
+                    await self._recycle(instance)
+                instance = min(self.instances, key=lambda i: i.active_pages)
+                instance.active_pages += 1
+            try:
+                yield instance
+            finally:
+                instance.active_pages -= 1
+                instance.pages_processed += 1
+                async with self._lock:
+                    if instance in self.instances:
+                        if self._worn_out(instance):
+                            await self._recycle(instance)
+                    elif instance.active_pages == 0:
+                        # Already swapped out, this was its last page
+                        await self._close_instance(instance)
+
+    async def close(self):
+        """Close every pooled browser"""
+        async with self._lock:
+            for instance in self.instances:
+                await self._close_instance(instance)
+            self.instances = []
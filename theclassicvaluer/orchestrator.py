@@ -0,0 +1,114 @@
+import asyncio
+import csv
+import os
+from datetime import datetime
+from multiprocessing import Process
+
+from playwright.async_api import async_playwright
+
+try:
+    from theclassicvaluer import scrap2, vehicle_page
+    from theclassicvaluer.rate_limit import DomainLimiter
+except ImportError:  # run as a script from this directory
+    import scrap2
+    import vehicle_page
+    from rate_limit import DomainLimiter
+
+# Each Chromium is already multi-threaded, so one worker process per two cores
+WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+
+async def collect_links(load_more_clicks):
+    """Vehicle links from the market page (scrap2's Load More walk)"""
+    async with async_playwright() as p:
+        pool = await scrap2.create_browser_pool(p, size=1, headless=True).start()
+        try:
+            async with pool.acquire() as inst:
+                page = await inst.context.new_page()
+                try:
+                    links = await scrap2.get_vehicle_links(page, load_more_clicks=load_more_clicks)
+                    await inst.context.storage_state(path=vehicle_page.STORAGE_STATE_FILE)
+                finally:
+                    await page.close()
+        finally:
+            await pool.close()
+    return links
+
+
+async def worker(links, shard_filename, workers):
+    """Scrape one shard of links into its own CSV with a browser pool of its own"""
+    # The politeness limit is for the whole run, so each process takes its share
+    vehicle_page.domain_limiter = DomainLimiter(rps=vehicle_page.REQUESTS_PER_SECOND / workers)
+
+    async with async_playwright() as p:
+        pool = await scrap2.create_browser_pool(p, size=1, headless=True).start()
+        client = vehicle_page.create_http_client()
+        csvfile, writer = vehicle_page.open_csv(shard_filename)
+        try:
+            scraped = await scrap2.scrape_links(links, pool, client, csvfile, writer)
+            print(f"📦 {shard_filename}: {scraped}/{len(links)} vehicles")
+        finally:
+            if client:
+                await client.aclose()
+            csvfile.close()
+            await pool.close()
+
+
+def run_worker(links, shard_filename, workers):
+    asyncio.run(worker(links, shard_filename, workers))
+
+
+def merge_shards(shard_filenames, csv_filename):
+    """Concatenate the shard CSVs under one header and delete them; returns the row count"""
+    rows = 0
+    with open(csv_filename, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(vehicle_page.FIELDNAMES)
+        for shard_filename in shard_filenames:
+            if not os.path.exists(shard_filename):
+                print(f"⚠️ Missing shard {shard_filename}, its worker probably crashed")
+                continue
+            with open(shard_filename, newline='', encoding='utf-8') as shard:
+                reader = csv.reader(shard)
+                next(reader, None)  # header
+                for row in reader:
+                    writer.writerow(row)
+                    rows += 1
+            os.remove(shard_filename)
+    return rows
+
+
+def main(workers=WORKERS, load_more_clicks=5):
+    """Collect links once, scrape them in worker processes, merge the shard CSVs"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    csv_filename = f"vehicle_data_{timestamp}.csv"
+
+    print("🔍 Getting vehicle links from the market page...")
+    vehicle_links = asyncio.run(collect_links(load_more_clicks))
+    if not vehicle_links:
+        print("❌ No vehicle links found!")
+        return
+
+    # Round-robin so every shard gets a similar mix of pages
+    shards = [vehicle_links[i::workers] for i in range(workers)]
+    shards = [shard for shard in shards if shard]
+    shard_filenames = [f"vehicle_data_{timestamp}_shard{i}.csv" for i in range(len(shards))]
+    print(f"🚗 Found {len(vehicle_links)} vehicle links, scraping in {len(shards)} processes")
+
+    processes = [
+        Process(target=run_worker, args=(shard, shard_filename, len(shards)))
+        for shard, shard_filename in zip(shards, shard_filenames)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    rows = merge_shards(shard_filenames, csv_filename)
+    print(f"\n🎉 Scraping completed!")
+    print(f"📊 Successfully scraped {rows} vehicles out of {len(vehicle_links)} total")
+    print(f"💾 Data saved to: {csv_filename}")
+
+
+if __name__ == "__main__":
+    main()
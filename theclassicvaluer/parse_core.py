@@ -0,0 +1,387 @@
+# parse_core.py
+"""
+CPU-bound parsing of Classic Valuer listing text.
+Kept free of Playwright and fully annotated so it can be compiled with mypyc
+(`mypyc theclassicvaluer/parse_core.py`) for the hot per-listing loop; the
+plain Python module is used when no compiled build is present.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+try:
+    import ahocorasick  # type: ignore
+except ImportError:
+    ahocorasick = None  # type: ignore
+
+try:
+    import xxhash  # type: ignore
+except ImportError:
+    xxhash = None  # type: ignore
+
+
+# Patterns used for every listing, compiled once at import
+_DATE_RE = re.compile(r'(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4})')
+_YEAR_RE = re.compile(r'\b(19[3-9]\d|20[0-2]\d)\b')
+_PRICE_RANGE_RE = re.compile(r'£([\d,]+(?:\.\d{2})?)\s*-\s*£([\d,]+(?:\.\d{2})?)')
+_PRICE_RE = re.compile(r'£([\d,]+(?:\.\d{2})?)')
+_SPYDER_RE = re.compile(r'\b(?:spyder|spider)\b')
+_WORDS_RE = re.compile(r'\b[A-Za-z0-9\-]+\b')
+_WS_RE = re.compile(r'\s+')
+
+# Keyword patterns below are lowercase and run over the listing's lowercased text,
+# so the matcher doesn't need re.IGNORECASE
+
+# Countries are whole words, so they are looked up token by token instead of by regex
+_TOKEN_RE = re.compile(r'\w+')
+_COUNTRY_TOKENS = {
+    'uk': 'United Kingdom', 'us': 'United States', 'usa': 'United States',
+    'france': 'France', 'germany': 'Germany', 'italy': 'Italy', 'japan': 'Japan',
+    'australia': 'Australia', 'canada': 'Canada'
+}
+# Words that may follow 'united '
+_UNITED_SUFFIXES = ((' kingdom', 'United Kingdom'), (' states', 'United States'))
+
+# Transmission hints, matched as plain substrings
+_MANUAL_RE = re.compile(r'manual|stick|clutch|5-speed|6-speed|mt')
+_AUTO_RE = re.compile(r'automatic|auto|tiptronic|dsg|cvt|paddle')
+
+_BOILERPLATE_RES = tuple(re.compile(pattern, re.IGNORECASE | re.DOTALL) for pattern in (
+    r'This is not an assessment of whether a vehicle is good value.*?recent sales\.?',
+    r'Rather, how the sale price or estimate mid-point compares to recent sales\.?',
+    r'Estimate\s*',
+    r'Auction\s*•\s*UK\s*'
+))
+
+MAKES = [
+    'Aston Martin', 'Alfa Romeo', 'Austin Healey', 'AC Cobra',
+    'Ferrari', 'Porsche', 'Lamborghini', 'Maserati', 'McLaren',
+    'Jaguar', 'Mercedes-Benz', 'Mercedes', 'BMW', 'Audi',
+    'Bentley', 'Rolls-Royce', 'Rolls Royce', 'Lotus', 'TVR',
+    'MG', 'Triumph', 'Austin', 'Morris', 'Riley', 'Healey',
+    'Ford', 'Chevrolet', 'Dodge', 'Plymouth', 'Pontiac',
+    'Cadillac', 'Buick', 'Oldsmobile', 'Lincoln',
+    'Volkswagen', 'VW', 'Peugeot', 'Renault', 'Citroën', 'Citroën',
+    'Fiat', 'Lancia', 'Volvo', 'Saab', 'MINI', 'Mini',
+    'Land Rover', 'Range Rover', 'Jeep', 'Toyota', 'Nissan',
+    'Honda', 'Mazda', 'Subaru', 'Mitsubishi', 'Datsun'
+]
+
+# Longer names first so e.g. 'Mercedes-Benz' wins over 'Mercedes'
+_MAKES_BY_LENGTH = tuple(sorted(MAKES, key=len, reverse=True))
+_MAKE_PATTERNS = tuple(
+    (make, re.compile(rf'\b{re.escape(make.lower())}\b'))
+    for make in _MAKES_BY_LENGTH
+)
+
+# Common words that end a model name
+_EXCLUDE_WORDS = frozenset({
+    'auction', 'uk', 'estimate', 'sold', 'price', 'sale',
+    'condition', 'mileage', 'this', 'is', 'not', 'an',
+    'assessment', 'of', 'whether', 'vehicle', 'good', 'value'
+})
+
+AUCTION_HOUSES = [
+    'Barrett-Jackson', 'RM Sotheby\'s', 'RM Sothebys', 'Bonhams',
+    'Christie\'s', 'Gooding & Company', 'Mecum', 'Artcurial',
+    'Coys', 'H&H', 'Silverstone Auctions', 'Historics',
+    'Collecting Cars', 'Bring a Trailer', 'BaT', 'Cars & Bids'
+]
+_AUCTION_HOUSES_LOWER = tuple((house.lower(), house) for house in AUCTION_HOUSES)
+
+
+@dataclass(slots=True)
+class Vehicle:
+    """One parsed listing; slots keep thousands of these far smaller than dicts"""
+    make: str = ''
+    model: str = ''
+    production_year: str = ''
+    date_of_sale: str = ''
+    sold_price: str = ''
+    manual_gearbox: bool = False
+    description: str = ''
+    auction_house: str = ''
+    country_of_sale: str = ''
+    spyder: bool = False
+
+    def csv_row(self) -> Tuple:
+        """Field values in CSV_HEADERS order"""
+        return (
+            self.make, self.model, self.production_year, self.date_of_sale, self.sold_price,
+            self.manual_gearbox, self.description, self.auction_house, self.country_of_sale,
+            self.spyder
+        )
+
+
+CSV_HEADERS = [
+    'make', 'model', 'production_year', 'date_of_sale', 'sold_price',
+    'manual_gearbox', 'description', 'auction_house', 'country_of_sale',
+    'spyder'
+]
+
+
+def _build_automaton(words: Sequence[str]):
+    """Aho-Corasick automaton over the lowercased words; values are (priority, word) by list order"""
+    automaton = ahocorasick.Automaton()
+    for priority, word in enumerate(words):
+        key = word.lower()
+        if key not in automaton:
+            automaton.add_word(key, (priority, word))
+    automaton.make_automaton()
+    return automaton
+
+
+# One linear scan finds every make / auction house mention (pyahocorasick is optional)
+_MAKE_AC = _build_automaton(_MAKES_BY_LENGTH) if ahocorasick else None
+_AUCTION_AC = _build_automaton(AUCTION_HOUSES) if ahocorasick else None
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+def _find_make(text: str, text_lower: str) -> Optional[Tuple[str, int]]:
+    """Longest known make mentioned in the text (ties in MAKES order) and the end of its first mention"""
+    if _MAKE_AC is None:
+        for make_name, pattern in _MAKE_PATTERNS:
+            match = pattern.search(text_lower)
+            if match:
+                return make_name, match.end()
+        return None
+
+    best: Optional[Tuple[int, str, int]] = None
+    for end, (priority, make_name) in _MAKE_AC.iter(text_lower):
+        start = end - len(make_name) + 1
+        # Whole words only, like the \b...\b patterns
+        if start > 0 and _is_word_char(text[start - 1]):
+            continue
+        if end + 1 < len(text) and _is_word_char(text[end + 1]):
+            continue
+        if best is None or priority < best[0]:
+            best = (priority, make_name, end + 1)
+    return (best[1], best[2]) if best else None
+
+
+def _text_hash(text: str) -> int:
+    """64-bit hash of the full listing text (xxh3 when available)"""
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(text.encode('utf-8', 'ignore'))
+    return hash(text)
+
+
+def process_vehicle_listings(raw_listings: List[Dict]) -> List[Vehicle]:
+    """Process raw listings into structured vehicle data."""
+    unique_listings: List[Vehicle] = []
+    seen_texts: Set[int] = set()  # hashes of listing texts already parsed
+    seen_vehicles: Set[Tuple[str, str, str, str]] = set()  # (make, model, year, price) already kept
+
+    for listing in raw_listings:
+        try:
+            text = listing.get('raw_text', '').strip()
+            if not text or len(text) < 30:
+                continue
+
+            # Nested page elements often repeat the same text; don't parse it twice
+            text_hash = _text_hash(text)
+            if text_hash in seen_texts:
+                continue
+            seen_texts.add(text_hash)
+
+            # Extract vehicle information
+            vehicle = parse_listing_text(text, listing)
+
+            # Only include listings with meaningful data
+            if not is_valid_vehicle_listing(vehicle):
+                continue
+
+            # Skip duplicates based on combination of make, model, year, price
+            vehicle_key = (
+                vehicle.make.lower(),
+                vehicle.model.lower(),
+                vehicle.production_year,
+                vehicle.sold_price
+            )
+            if vehicle_key in seen_vehicles:
+                continue
+            seen_vehicles.add(vehicle_key)
+            unique_listings.append(vehicle)
+
+        except Exception as error:
+            print(f'Error processing listing: {error}')
+            continue
+
+    print(f'Processed {len(unique_listings)} unique vehicle listings')
+    return unique_listings
+
+
+def _pre_parse(text: str) -> Dict[str, str]:
+    """Python version of the date/year/price extraction done by the listings page script"""
+    date_match = _DATE_RE.search(text)
+    year_match = _YEAR_RE.search(text)
+    range_match = _PRICE_RANGE_RE.search(text)
+    price_match = range_match or _PRICE_RE.search(text)
+    return {
+        'date': date_match.group(1) if date_match else '',
+        'year': year_match.group(1) if year_match else '',
+        'price': price_match.group(1) if price_match else '',
+        'price_high': range_match.group(2) if range_match else ''
+    }
+
+
+def parse_listing_text(text: str, pre_parsed: Optional[Dict] = None) -> Vehicle:
+    """
+    Parse individual listing text to extract vehicle information.
+    pre_parsed holds the date/year/price fields when the page script already extracted them.
+    """
+    if pre_parsed is None or 'date' not in pre_parsed:
+        pre_parsed = _pre_parse(text)
+
+    # Lowercased once and shared by every keyword lookup below
+    text_lower = text.lower()
+
+    # Auction date (typically at the start)
+    auction_date = format_date(pre_parsed['date']) if pre_parsed['date'] else ''
+
+    # Year (4 digits, first realistic car year)
+    production_year = pre_parsed['year']
+
+    # Extract make and model more accurately
+    make_model = extract_make_model(text, text_lower)
+
+    # Price ranges (£X,XXX - £X,XXX) become their midpoint
+    price = ''
+    if pre_parsed['price_high']:
+        low = int(pre_parsed['price'].replace(',', ''))
+        high = int(pre_parsed['price_high'].replace(',', ''))
+        midpoint = int((low + high) / 2)
+        price = f'£{midpoint:,}'
+    elif pre_parsed['price']:
+        price = f"£{pre_parsed['price']}"
+
+    # Check for transmission type
+    has_manual = _MANUAL_RE.search(text_lower) is not None
+    has_auto = _AUTO_RE.search(text_lower) is not None
+
+    # If both or neither found, default to unknown (False)
+    manual_gearbox = has_manual and not has_auto
+
+    # Check for Spyder/Spider variants
+    is_spyder = _SPYDER_RE.search(text_lower) is not None
+
+    return Vehicle(
+        make=make_model['make'],
+        model=make_model['model'],
+        production_year=production_year,
+        date_of_sale=auction_date,
+        sold_price=price,
+        manual_gearbox=manual_gearbox,
+        description=clean_description_text(text),
+        auction_house=extract_auction_house(text_lower),
+        country_of_sale=extract_country(text_lower),
+        spyder=is_spyder,
+    )
+
+
+def extract_make_model(text: str, text_lower: str) -> Dict[str, str]:
+    """Improved make and model extraction."""
+
+    make = ''
+    model = ''
+
+    found = _find_make(text, text_lower)
+    if found:
+        make, make_pos = found
+
+        # Extract model: look for words after the make name
+        after_make = text[make_pos:].strip()
+
+        # Find model words (excluding common non-model words)
+        model_words = []
+        words = _WORDS_RE.findall(after_make)
+
+        for word in words[:4]:  # Take up to 4 words
+            if len(word) <= 1 or word.lower() in _EXCLUDE_WORDS:
+                break  # Stop at first excluded word
+            model_words.append(word)
+
+        model = ' '.join(model_words) if model_words else ''
+
+    return {'make': make, 'model': model}
+
+
+def extract_country(text_lower: str) -> str:
+    """Improved country extraction."""
+    for token in _TOKEN_RE.finditer(text_lower):
+        word = token.group()
+        country = _COUNTRY_TOKENS.get(word)
+        if country:
+            return country
+        if word == 'united':
+            end = token.end()
+            for suffix, country in _UNITED_SUFFIXES:
+                after = end + len(suffix)
+                if not text_lower.startswith(suffix, end):
+                    continue
+                if after == len(text_lower) or not _is_word_char(text_lower[after]):
+                    return country
+    return ''
+
+
+def extract_auction_house(text_lower: str) -> str:
+    """Improved auction house extraction."""
+    if _AUCTION_AC is not None:
+        # Earliest house in AUCTION_HOUSES order wins, as with the substring loop
+        hits = [value for _, value in _AUCTION_AC.iter(text_lower)]
+        return min(hits)[1] if hits else ''
+
+    for house_lower, house in _AUCTION_HOUSES_LOWER:
+        if house_lower in text_lower:
+            return house
+
+    return ''
+
+
+def clean_description_text(text: str) -> str:
+    """Clean and format description text."""
+    # Remove excessive whitespace
+    cleaned = _WS_RE.sub(' ', text.strip())
+
+    # Remove common boilerplate text
+    for pattern in _BOILERPLATE_RES:
+        cleaned = pattern.sub('', cleaned)
+
+    # Limit length
+    if len(cleaned) > 300:
+        cleaned = cleaned[:300] + '...'
+
+    return cleaned.strip()
+
+
+def format_date(date_str: str) -> str:
+    """Convert date string to DD/MM/YYYY format."""
+    # Callers pass _DATE_RE matches ("27 Jul 2025"); anything else fails to parse and is kept as-is
+    try:
+        return datetime.strptime(date_str, '%d %b %Y').strftime('%d/%m/%Y')
+    except ValueError:
+        return date_str
+
+
+def is_valid_vehicle_listing(vehicle: Vehicle) -> bool:
+    """Check if a listing contains valid vehicle data."""
+    # Must have at least 2 of: year, price, make or model, a meaningful description.
+    # Cheapest checks first so most listings return early.
+    criteria_met = 0
+    if vehicle.production_year:
+        criteria_met += 1
+    if vehicle.sold_price:
+        criteria_met += 1
+    if criteria_met >= 2:
+        return True
+    if vehicle.make or vehicle.model:
+        criteria_met += 1
+        if criteria_met >= 2:
+            return True
+    # clean_description_text has already stripped the description
+    return criteria_met + (len(vehicle.description) > 20) >= 2
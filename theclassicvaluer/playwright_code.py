@@ -1,13 +1,87 @@
-import json
-import time
-import re
+import os
 import asyncio
+import multiprocessing
+import uuid
 import csv
+import dataclasses
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
-from pathlib import Path
-
-from playwright.async_api import async_playwright, Browser, Page, BrowserContext
+from typing import List, Dict, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+import orjson
+from playwright.async_api import async_playwright, Route
+
+try:
+    from theclassicvaluer import parse_core
+except ImportError:  # run as a script from this directory
+    import parse_core
+
+
+# The scraper only reads page text, so these are never downloaded
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'stylesheet', 'media'}
+
+
+# Every listing's text carries its auction date, so a date on the page means listings have rendered
+_DATE_JS = r'/\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4}/'
+LISTINGS_READY_JS = f"() => {_DATE_JS}.test(document.body?.textContent || '')"
+# Text from the first auction date on, used to tell when pagination has replaced the listings
+LISTINGS_SIGNATURE_JS = f"""() => {{
+    const text = document.body?.textContent || '';
+    const match = text.match({_DATE_JS});
+    return match ? text.substr(match.index, 300) : '';
+}}"""
+PAGE_CHANGED_JS = f"([url, signature]) => location.href !== url || ({LISTINGS_SIGNATURE_JS})() !== signature"
+LISTINGS_TIMEOUT = 10000
+
+# Date, year and price are pulled out in the page with V8's regex engine, so Python
+# only has to tidy them up; must agree with parse_core._pre_parse
+PRE_PARSE_JS = r"""(text) => {
+    const date = /\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4}/.exec(text);
+    const year = /\b(19[3-9]\d|20[0-2]\d)\b/.exec(text);
+    const range = /£([\d,]+(?:\.\d{2})?)\s*-\s*£([\d,]+(?:\.\d{2})?)/.exec(text);
+    const price = range || /£([\d,]+(?:\.\d{2})?)/.exec(text);
+    return {
+        date: date ? date[0] : '',
+        year: year ? year[1] : '',
+        price: price ? price[1] : '',
+        price_high: range ? range[2] : ''
+    };
+}"""
+
+# Fields are whitespace-normalized at parse time; this only guards against a stray line break
+_NEWLINE_TABLE = str.maketrans({'\n': ' ', '\r': ' '})
+
+
+# Pages are parsed in worker processes so regex work doesn't hold up the event loop.
+# One pool is shared by every scraper in the process; spawned workers don't inherit
+# the threads of a running server the way forked ones would.
+PARSE_WORKERS = min(os.cpu_count() or 1, 4)
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """The shared parse pool, created on first use"""
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context('spawn')
+        )
+    return _parse_pool
+
+
+async def shutdown_parse_pool():
+    """Stop the shared parse pool without blocking the event loop while workers exit"""
+    global _parse_pool
+    pool, _parse_pool = _parse_pool, None
+    if pool is not None:
+        await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+
+
+async def _block_assets(route: Route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
 
 
 class ImprovedClassicValuerScraper:
@@ -17,8 +91,11 @@ class ImprovedClassicValuerScraper:
     Now saves data in CSV format.
     """
     
-    def __init__(self, options: Dict = None):
-        """Initialize the scraper with configuration options."""
+    def __init__(self, options: Dict = None, pool: Optional[Executor] = None):
+        """
+        Initialize the scraper with configuration options.
+        pool runs the page parsing; defaults to the process-wide get_parse_pool().
+        """
         self.browser = None
         self.context = None
         self.page = None
@@ -30,21 +107,28 @@ class ImprovedClassicValuerScraper:
             'headless': False,
             'timeout': 30000,
             'delay': 3000,
-            'output_file': 'classic_valuer_improved.csv',
+            'output_file': None,  # defaults to a per-run classic_valuer_<timestamp>_<id>.csv
             'max_pages': 5,
+            'block_assets': True,
             'viewport': {'width': 1920, 'height': 1080},
             'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
         
         self.options = {**default_options, **(options or {})}
+        if not self.options['output_file']:
+            # Unique per run, so concurrent jobs and failed runs never clobber another run's file
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            self.options['output_file'] = f'classic_valuer_{timestamp}_{uuid.uuid4().hex[:6]}.csv'
         self.results = []
         
-        # CSV column headers
-        self.csv_headers = [
-            'make', 'model', 'production_year', 'date_of_sale', 'sold_price',
-            'manual_gearbox', 'description', 'auction_house', 'country_of_sale',
-            'spyder'
-        ]
+        self._pool = pool
+        
+        # Output CSV, opened when the first parsed listings are written
+        self._csv_file = None
+        self._csv_writer = None
+        
+        # CSV column headers, in parse_core.Vehicle.csv_row() order
+        self.csv_headers = parse_core.CSV_HEADERS
         
     async def init(self):
         """Initialize the browser and create a new page."""
@@ -61,6 +145,8 @@ class ImprovedClassicValuerScraper:
                 viewport=self.options['viewport'],
                 user_agent=self.options['user_agent']
             )
+            if self.options['block_assets']:
+                await self.context.route('**/*', _block_assets)
             
             self.page = await self.context.new_page()
             self.page.set_default_timeout(self.options['timeout'])
@@ -75,11 +161,10 @@ class ImprovedClassicValuerScraper:
         """Navigate to the market page with error handling."""
         try:
             print(f'Navigating to: {self.market_url}')
-            await self.page.goto(self.market_url, wait_until='networkidle')
-            await self.page.wait_for_timeout(self.options['delay'])
+            await self.page.goto(self.market_url, wait_until='domcontentloaded')
             
-            # Wait for content to load
-            await self.page.wait_for_selector('body', timeout=10000)
+            # Wait only until the listings themselves are in the DOM
+            await self.wait_for_page(LISTINGS_READY_JS)
             
             return True
             
@@ -92,14 +177,13 @@ class ImprovedClassicValuerScraper:
         try:
             print('Extracting vehicle listings...')
             
-            # Wait for page content
-            await self.page.wait_for_timeout(5000)
-            
             # Get the page content and extract listings more intelligently
-            listings = await self.page.evaluate('''
+            listings = await self.page.evaluate(r'''
                 () => {
                     const listings = [];
                     
+                    const preParse = ''' + PRE_PARSE_JS + r''';
+                    
                     // Look for common patterns in classic car auction sites
                     const selectors = [
                         '[class*="listing"]',
@@ -146,6 +230,7 @@ class ImprovedClassicValuerScraper:
                                     listings.push({
                                         index: index,
                                         raw_text: listingText,
+                                        ...preParse(listingText),
                                         extraction_method: 'date_pattern_split'
                                     });
                                 }
@@ -159,7 +244,7 @@ class ImprovedClassicValuerScraper:
                                 listings.push({
                                     index: index,
                                     raw_text: text,
-                                    html: element.innerHTML,
+                                    ...preParse(text),
                                     extraction_method: 'structured_elements'
                                 });
                             }
@@ -177,264 +262,7 @@ class ImprovedClassicValuerScraper:
             print(f'Failed to extract listings: {error}')
             return []
 
-    def process_vehicle_listings(self, raw_listings: List[Dict]) -> List[Dict]:
-        """Process raw listings into structured vehicle data."""
-        processed_listings = []
-        seen_texts = set()  # Prevent duplicates
-        
-        for listing in raw_listings:
-            try:
-                text = listing.get('raw_text', '').strip()
-                if not text or len(text) < 30:
-                    continue
-                
-                # Skip duplicates
-                text_hash = hash(text[:100])  # Hash first 100 chars
-                if text_hash in seen_texts:
-                    continue
-                seen_texts.add(text_hash)
-                
-                # Extract vehicle information
-                vehicle_data = self.parse_listing_text(text, listing.get('index', 0))
-                
-                # Only include listings with meaningful data
-                if self.is_valid_vehicle_listing(vehicle_data):
-                    processed_listings.append(vehicle_data)
-                    
-            except Exception as error:
-                print(f'Error processing listing: {error}')
-                continue
-        
-        # Remove duplicates based on combination of make, model, year, price
-        unique_listings = []
-        seen_vehicles = set()
-        
-        for listing in processed_listings:
-            vehicle_key = (
-                listing.get('make', '').lower(),
-                listing.get('model', '').lower(), 
-                listing.get('production_year', ''),
-                listing.get('sold_price', '')
-            )
-            
-            if vehicle_key not in seen_vehicles:
-                seen_vehicles.add(vehicle_key)
-                unique_listings.append(listing)
-        
-        print(f'Processed {len(unique_listings)} unique vehicle listings')
-        return unique_listings
-
-    def parse_listing_text(self, text: str, index: int) -> Dict:
-        """Parse individual listing text to extract vehicle information."""
-        
-        # Extract auction date (typically at the start)
-        date_match = re.search(r'(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4})', text)
-        auction_date = self.format_date(date_match.group(1)) if date_match else ''
-        
-        # Extract year (4 digits, prefer realistic car years)
-        year_matches = re.findall(r'\b(19[3-9]\d|20[0-2]\d)\b', text)
-        production_year = year_matches[0] if year_matches else ''
-        
-        # Extract make and model more accurately
-        make_model = self.extract_make_model_improved(text)
-        
-        # Extract price ranges (£X,XXX - £X,XXX or £X,XXX)
-        price_patterns = [
-            r'£([\d,]+(?:\.\d{2})?)\s*-\s*£([\d,]+(?:\.\d{2})?)',  # Range
-            r'£([\d,]+(?:\.\d{2})?)'  # Single price
-        ]
-        
-        price = ''
-        for pattern in price_patterns:
-            price_match = re.search(pattern, text)
-            if price_match:
-                if len(price_match.groups()) == 2:  # Range
-                    # Use midpoint of range
-                    low = int(price_match.group(1).replace(',', ''))
-                    high = int(price_match.group(2).replace(',', ''))
-                    midpoint = int((low + high) / 2)
-                    price = f'£{midpoint:,}'
-                else:  # Single price
-                    price = f"£{price_match.group(1)}"
-                break
-        
-        # Check for transmission type
-        manual_indicators = ['manual', 'stick', 'clutch', '5-speed', '6-speed', 'mt']
-        auto_indicators = ['automatic', 'auto', 'tiptronic', 'dsg', 'cvt', 'paddle']
-        
-        text_lower = text.lower()
-        has_manual = any(indicator in text_lower for indicator in manual_indicators)
-        has_auto = any(indicator in text_lower for indicator in auto_indicators)
-        
-        # If both or neither found, default to unknown (False)
-        manual_gearbox = has_manual and not has_auto
-        
-        # Check for Spyder/Spider variants
-        is_spyder = bool(re.search(r'\b(?:spyder|spider)\b', text, re.IGNORECASE))
-        
-        # Extract country (look for "UK", "US", country names)
-        country = self.extract_country_improved(text)
-        
-        # Extract auction house
-        auction_house = self.extract_auction_house_improved(text)
-        
-        # Create clean description
-        description = self.clean_description_text(text)
-        
-        return {
-            'make': make_model['make'],
-            'model': make_model['model'],
-            'production_year': production_year,
-            'date_of_sale': auction_date,
-            'sold_price': price,
-            'manual_gearbox': manual_gearbox,
-            'description': description,
-            'auction_house': auction_house,
-            'country_of_sale': country,
-            'spyder': is_spyder,
-        }
-
-    def extract_make_model_improved(self, text: str) -> Dict[str, str]:
-        """Improved make and model extraction."""
-        
-        # Updated list of car makes with better patterns
-        makes = [
-            'Aston Martin', 'Alfa Romeo', 'Austin Healey', 'AC Cobra',
-            'Ferrari', 'Porsche', 'Lamborghini', 'Maserati', 'McLaren',
-            'Jaguar', 'Mercedes-Benz', 'Mercedes', 'BMW', 'Audi', 
-            'Bentley', 'Rolls-Royce', 'Rolls Royce', 'Lotus', 'TVR',
-            'MG', 'Triumph', 'Austin', 'Morris', 'Riley', 'Healey',
-            'Ford', 'Chevrolet', 'Dodge', 'Plymouth', 'Pontiac',
-            'Cadillac', 'Buick', 'Oldsmobile', 'Lincoln',
-            'Volkswagen', 'VW', 'Peugeot', 'Renault', 'Citroën', 'Citroën',
-            'Fiat', 'Lancia', 'Volvo', 'Saab', 'MINI', 'Mini',
-            'Land Rover', 'Range Rover', 'Jeep', 'Toyota', 'Nissan',
-            'Honda', 'Mazda', 'Subaru', 'Mitsubishi', 'Datsun'
-        ]
-        
-        # Sort by length to match longer names first
-        makes_sorted = sorted(makes, key=len, reverse=True)
-        
-        make = ''
-        model = ''
-        
-        for make_name in makes_sorted:
-            # Create a more flexible pattern
-            pattern = rf'\b{re.escape(make_name)}\b'
-            match = re.search(pattern, text, re.IGNORECASE)
-            
-            if match:
-                make = make_name
-                
-                # Extract model: look for words after the make name
-                make_pos = match.end()
-                after_make = text[make_pos:].strip()
-                
-                # Find model words (excluding common non-model words)
-                exclude_words = {
-                    'auction', 'uk', 'estimate', 'sold', 'price', 'sale',
-                    'condition', 'mileage', 'this', 'is', 'not', 'an',
-                    'assessment', 'of', 'whether', 'vehicle', 'good', 'value'
-                }
-                
-                model_words = []
-                words = re.findall(r'\b[A-Za-z0-9\-]+\b', after_make)
-                
-                for word in words[:4]:  # Take up to 4 words
-                    if word.lower() not in exclude_words and len(word) > 1:
-                        model_words.append(word)
-                    else:
-                        break  # Stop at first excluded word
-                
-                model = ' '.join(model_words) if model_words else ''
-                break
-        
-        return {'make': make, 'model': model}
-
-    def extract_country_improved(self, text: str) -> str:
-        """Improved country extraction."""
-        country_patterns = [
-            (r'\bUK\b', 'United Kingdom'),
-            (r'\bUnited Kingdom\b', 'United Kingdom'),
-            (r'\bUSA?\b', 'United States'),
-            (r'\bUnited States\b', 'United States'),
-            (r'\bFrance\b', 'France'),
-            (r'\bGermany\b', 'Germany'),
-            (r'\bItaly\b', 'Italy'),
-            (r'\bJapan\b', 'Japan'),
-            (r'\bAustralia\b', 'Australia'),
-            (r'\bCanada\b', 'Canada')
-        ]
-        
-        for pattern, country_name in country_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                return country_name
-        
-        return ''
-
-    def extract_auction_house_improved(self, text: str) -> str:
-        """Improved auction house extraction."""
-        auction_houses = [
-            'Barrett-Jackson', 'RM Sotheby\'s', 'RM Sothebys', 'Bonhams',
-            'Christie\'s', 'Gooding & Company', 'Mecum', 'Artcurial',
-            'Coys', 'H&H', 'Silverstone Auctions', 'Historics',
-            'Collecting Cars', 'Bring a Trailer', 'BaT', 'Cars & Bids'
-        ]
-        
-        text_lower = text.lower()
-        for house in auction_houses:
-            if house.lower() in text_lower:
-                return house
-        
-        return ''
-
-    def clean_description_text(self, text: str) -> str:
-        """Clean and format description text."""
-        # Remove excessive whitespace
-        cleaned = re.sub(r'\s+', ' ', text.strip())
-        
-        # Remove common boilerplate text
-        boilerplate_patterns = [
-            r'This is not an assessment of whether a vehicle is good value.*?recent sales\.?',
-            r'Rather, how the sale price or estimate mid-point compares to recent sales\.?',
-            r'Estimate\s*',
-            r'Auction\s*•\s*UK\s*'
-        ]
-        
-        for pattern in boilerplate_patterns:
-            cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE | re.DOTALL)
-        
-        # Limit length
-        if len(cleaned) > 300:
-            cleaned = cleaned[:300] + '...'
-        
-        return cleaned.strip()
-
-    def format_date(self, date_str: str) -> str:
-        """Convert date string to DD/MM/YYYY format."""
-        try:
-            # Handle "27 Jul 2025" format
-            if re.match(r'\d{1,2}\s+[A-Za-z]{3}\s+\d{4}', date_str):
-                from datetime import datetime
-                parsed_date = datetime.strptime(date_str, '%d %b %Y')
-                return parsed_date.strftime('%d/%m/%Y')
-        except:
-            pass
-        
-        return date_str
-
-    def is_valid_vehicle_listing(self, vehicle_data: Dict) -> bool:
-        """Check if a listing contains valid vehicle data."""
-        has_make_or_model = bool(vehicle_data.get('make') or vehicle_data.get('model'))
-        has_year = bool(vehicle_data.get('production_year'))
-        has_price = bool(vehicle_data.get('sold_price'))
-        has_meaningful_description = len(vehicle_data.get('description', '').strip()) > 20
-        
-        # Must have at least 2 of these criteria
-        criteria_met = sum([has_make_or_model, has_year, has_price, has_meaningful_description])
-        return criteria_met >= 2
-
-    async def scrape_market_data(self) -> List[Dict]:
+    async def scrape_market_data(self) -> List[parse_core.Vehicle]:
         """Main scraping method."""
         try:
             if not await self.navigate_to_market():
@@ -442,6 +270,18 @@ class ImprovedClassicValuerScraper:
             
             all_listings = []
             page_count = 0
+            # Each page is parsed in a worker process while the browser moves on to the next one
+            loop = asyncio.get_running_loop()
+            pending_pages = []
+            
+            async def write_parsed_pages(wait: bool):
+                """Append parsed pages to the CSV in page order (only those already done unless wait)"""
+                while pending_pages and (wait or pending_pages[0][1].done()):
+                    page_number, parsed = pending_pages.pop(0)
+                    processed_listings = await parsed
+                    self.write_results_csv(processed_listings)
+                    all_listings.extend(processed_listings)
+                    print(f'Found {len(processed_listings)} valid listings on page {page_number}')
             
             while page_count < self.options['max_pages']:
                 print(f'Processing page {page_count + 1}...')
@@ -453,11 +293,11 @@ class ImprovedClassicValuerScraper:
                     print('No more listings found')
                     break
                 
-                # Process the listings
-                processed_listings = self.process_vehicle_listings(raw_listings)
-                all_listings.extend(processed_listings)
-                
-                print(f'Found {len(processed_listings)} valid listings on page {page_count + 1}')
+                # Process the listings in the background
+                pending_pages.append((page_count + 1, loop.run_in_executor(
+                    self._pool or get_parse_pool(), parse_core.process_vehicle_listings, raw_listings
+                )))
+                await write_parsed_pages(wait=False)
                 
                 # Try to navigate to next page (if pagination exists)
                 has_next_page = await self.navigate_to_next_page()
@@ -468,6 +308,8 @@ class ImprovedClassicValuerScraper:
                 page_count += 1
                 await self.page.wait_for_timeout(self.options['delay'])
             
+            await write_parsed_pages(wait=True)
+            
             print(f'Total unique listings found: {len(all_listings)}')
             return all_listings
             
@@ -475,6 +317,13 @@ class ImprovedClassicValuerScraper:
             print(f'Error during scraping: {error}')
             return []
 
+    async def wait_for_page(self, condition_js: str, arg=None):
+        """Wait for a page condition, carrying on with what is loaded if it times out."""
+        try:
+            await self.page.wait_for_function(condition_js, arg=arg, timeout=LISTINGS_TIMEOUT)
+        except Exception as error:
+            print(f'⚠️ Page not ready after {LISTINGS_TIMEOUT} ms, continuing: {error}')
+
     async def navigate_to_next_page(self) -> bool:
         """Try to navigate to the next page of results."""
         try:
@@ -491,9 +340,13 @@ class ImprovedClassicValuerScraper:
                 try:
                     element = await self.page.query_selector(selector)
                     if element and await element.is_visible():
+                        url = self.page.url
+                        signature = await self.page.evaluate(LISTINGS_SIGNATURE_JS)
                         print(f'Clicking next page: {selector}')
                         await element.click()
-                        await self.page.wait_for_timeout(3000)
+                        # Done once the URL changes or the listings are replaced
+                        await self.wait_for_page(PAGE_CHANGED_JS, [url, signature])
+                        await self.wait_for_page(LISTINGS_READY_JS)
                         return True
                 except:
                     continue
@@ -504,48 +357,24 @@ class ImprovedClassicValuerScraper:
             print(f'Error navigating to next page: {error}')
             return False
 
-    async def save_results_csv(self, listings: List[Dict]) -> str:
-        """Save results to CSV file."""
-        try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f'classic_valuer_improved.csv'
-            
-            # Ensure all listings have all required fields
-            for listing in listings:
-                for header in self.csv_headers:
-                    if header not in listing:
-                        listing[header] = ''
-            
-            # Write CSV file
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=self.csv_headers)
-                
-                # Write header row
-                writer.writeheader()
-                
-                # Write data rows
-                for listing in listings:
-                    # Clean data for CSV (remove newlines and commas that might break formatting)
-                    cleaned_listing = {}
-                    for key, value in listing.items():
-                        if isinstance(value, str):
-                            # Replace newlines and excessive commas
-                            cleaned_value = value.replace('\n', ' ').replace('\r', ' ')
-                            cleaned_value = re.sub(r'\s+', ' ', cleaned_value).strip()
-                            cleaned_listing[key] = cleaned_value
-                        else:
-                            cleaned_listing[key] = value
-                    
-                    writer.writerow(cleaned_listing)
-
-            print(f'Results saved to CSV: {filename}')
-            return filename
-
-        except Exception as error:
-            print(f'Failed to save CSV results: {error}')
-            raise error
-
-    async def save_results_json_backup(self, listings: List[Dict]) -> str:
+    def open_results_csv(self):
+        """Create the output CSV file and write its header row."""
+        self._csv_file = open(self.options['output_file'], 'w', newline='', encoding='utf-8')
+        self._csv_writer = csv.writer(self._csv_file, quoting=csv.QUOTE_MINIMAL)
+        self._csv_writer.writerow(self.csv_headers)
+
+    def write_results_csv(self, listings: List[parse_core.Vehicle]):
+        """Append parsed listings to the output CSV, creating it on the first listings."""
+        if not listings:
+            return
+        if self._csv_file is None:
+            self.open_results_csv()
+        self._csv_writer.writerows(
+            [value.translate(_NEWLINE_TABLE) if isinstance(value, str) else value for value in listing.csv_row()]
+            for listing in listings
+        )
+
+    async def save_results_json_backup(self, listings: List[parse_core.Vehicle]) -> str:
         """Save results to JSON file as backup."""
         try:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -562,8 +391,9 @@ class ImprovedClassicValuerScraper:
                 'results': listings
             }
 
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, indent=2, ensure_ascii=False)
+            # orjson writes UTF-8 bytes, so non-ASCII text stays as-is
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(output_data, option=orjson.OPT_INDENT_2))
 
             print(f'Backup JSON saved: {filename}')
             return filename
@@ -578,24 +408,27 @@ class ImprovedClassicValuerScraper:
             await self.context.close()
         if self.browser:
             await self.browser.close()
+        if self._csv_file:
+            self._csv_file.close()
         print('Browser closed')
 
     async def scrape(self) -> Dict:
         """Main scraping entry point."""
+        listings = []
         try:
             await self.init()
             listings = await self.scrape_market_data()
             
             if listings:
-                # Save to CSV (primary output)
-                csv_filename = await self.save_results_csv(listings)
-                
+                # CSV (primary output) was written page by page during scraping
+                csv_filename = self.options['output_file']
+                print(f'Results saved to CSV: {csv_filename}')
                 
                 return {
                     'success': True,
                     'records_found': len(listings),
                     'csv_file': csv_filename,
-                    'results': listings[:10]  # Return first 10 for preview
+                    'results': [dataclasses.asdict(listing) for listing in listings[:10]]  # First 10 for preview
                 }
             else:
                 return {
@@ -613,6 +446,9 @@ class ImprovedClassicValuerScraper:
             }
         finally:
             await self.close()
+            # Pages written before a failure would otherwise look like a finished run
+            if not listings and os.path.exists(self.options['output_file']):
+                os.remove(self.options['output_file'])
 
 
 # Usage functions
@@ -625,7 +461,10 @@ async def run_improved_scraper():
         'max_pages': 3
     })
 
-    result = await scraper.scrape()
+    try:
+        result = await scraper.scrape()
+    finally:
+        await shutdown_parse_pool()
     
     if result['success']:
         print(f'\n✅ Scraping completed successfully!')
@@ -0,0 +1,55 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+
+# Responses that mean the server wants us to slow down
+BACKOFF_STATUSES = {429, 503}
+
+
+@dataclass
+class _HostState:
+    delay: float
+    last_request: float = 0.0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class DomainLimiter:
+    """
+    Spaces out request starts per host, at most rps per second.
+    The gap doubles on 429/503 (up to max_delay) and eases back after successful responses.
+    """
+
+    def __init__(self, rps: float = 5, max_delay: float = 30):
+        self.min_delay = 1 / rps
+        self.max_delay = max_delay
+        self._hosts: Dict[str, _HostState] = {}
+
+    def _state(self, url: str) -> _HostState:
+        host = urlsplit(url).hostname or ""
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.min_delay)
+        return state
+
+    async def wait(self, url: str):
+        """Sleep until the next request to url's host is allowed"""
+        state = self._state(url)
+        async with state.lock:
+            remaining = state.last_request + state.delay - time.monotonic()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+            state.last_request = time.monotonic()
+
+    def record(self, url: str, status: Optional[int]):
+        """Adjust the host's gap from a response status"""
+        if status is None:
+            return
+        state = self._state(url)
+        if status in BACKOFF_STATUSES:
+            state.delay = min(state.delay * 2, self.max_delay)
+            print(f"⚠️ {urlsplit(url).hostname} answered {status}, slowing to one request every {state.delay:.2f}s")
+        elif status < 400 and state.delay > self.min_delay:
+            state.delay = max(state.delay / 2, self.min_delay)
@@ -1,154 +1,35 @@
-from playwright.sync_api import sync_playwright
-import csv
-import time
+from playwright.async_api import async_playwright
+import asyncio
+import os
 from datetime import datetime
 
-def scrape_vehicle_details(page, url):
-    """Scrape individual vehicle details from a vehicle page"""
-    try:
-        page.goto(url)
-        page.wait_for_timeout(3000)  # Reduced timeout for efficiency
-        
-        # Scrape price range
-        price_range = ""
-        price_elements = page.locator("h2:has-text('£')").all()
-        if price_elements:
-            price_range = price_elements[0].text_content().strip()
-        
-        # Scrape title (year and make/model)
-        title = ""
-        title_elements = page.locator("h2").all()
-        for element in title_elements:
-            text = element.text_content().strip()
-            if text and not text.startswith('£'):
-                title = text
-                break
-        
-        # Parse title to extract year, make, and model
-        year = ""
-        make = ""
-        model = ""
-        if title:
-            parts = title.split()
-            if parts:
-                year = parts[0]  # First part should be year
-                if len(parts) > 1:
-                    make = parts[1]  # Second part should be make
-                if len(parts) > 2:
-                    model = " ".join(parts[2:])  # Rest is model
-        
-        # Scrape meta information (auction house, country, date, lot)
-        meta_info = ""
-        meta_elements = page.locator("p:has-text('•')").all()
-        if meta_elements:
-            meta_info = meta_elements[0].text_content().strip()
-        
-        # Parse meta information
-        auction_house = ""
-        country = ""
-        date_of_sale = ""
-        lot_number = ""
-        
-        if meta_info:
-            meta_parts = [part.strip() for part in meta_info.split('•')]
-            if len(meta_parts) >= 1:
-                auction_house = meta_parts[0]
-            if len(meta_parts) >= 2:
-                country = meta_parts[1]
-            if len(meta_parts) >= 3:
-                date_of_sale = meta_parts[2]
-            if len(meta_parts) >= 4:
-                lot_number = meta_parts[3]
-        
-        # Scrape technical details (Manual, mileage, RHD)
-        gearbox = ""
-        mileage = ""
-        lhd_rhd = ""
-        
-        # Look for specific technical details
-        manual_element = page.locator("p:has-text('Manual')").first
-        if manual_element.count() > 0:
-            gearbox = "Manual"
-        
-        # Also check for Automatic
-        automatic_element = page.locator("p:has-text('Automatic')").first
-        if automatic_element.count() > 0:
-            gearbox = "Automatic"
-        
-        miles_elements = page.locator("p:has-text('miles')").all()
-        for element in miles_elements:
-            text = element.text_content().strip()
-            if "miles" in text:
-                mileage = text
-                break
-        
-        rhd_element = page.locator("p:has-text('RHD')").first
-        if rhd_element.count() > 0:
-            lhd_rhd = "RHD"
-        
-        lhd_element = page.locator("p:has-text('LHD')").first
-        if lhd_element.count() > 0:
-            lhd_rhd = "LHD"
-        
-        # Scrape description (the long text paragraph)
-        description = ""
-        # Look for paragraphs with substantial text content
-        description_elements = page.locator("p").all()
-        for element in description_elements:
-            text = element.text_content().strip()
-            if len(text) > 100 and not "•" in text and not text.startswith("Manual") and not "miles" in text and not text in ["RHD", "LHD"]:
-                description = text
-                break
-        
-        # Determine if it's a Spyder (convertible/open-top)
-        spyder = ""
-        if "tourer" in description.lower() or "convertible" in description.lower() or "roadster" in description.lower() or "spyder" in description.lower():
-            spyder = "Yes"
-        else:
-            spyder = "No"
-        
-        # Return as dictionary for CSV export
-        return {
-            "Make": make,
-            "Model": model,
-            "Production Year": year,
-            "Date of Sale": date_of_sale,
-            "Sold Price": price_range,
-            "Gearbox": gearbox,
-            "Description": description,
-            "Auction House": auction_house,
-            "Country of Sale": country,
-            "Spyder": spyder,
-            "LHD_RHD": lhd_rhd,
-            "URL": url
-        }
-        
-    except Exception as e:
-        print(f"Error scraping {url}: {e}")
-        return None
+try:
+    from theclassicvaluer.vehicle_page import (
+        USER_AGENT, VIEWPORT, STORAGE_STATE_FILE, block_assets, create_http_client,
+        fetch_vehicle_details, open_csv, scrape_vehicle_details
+    )
+except ImportError:  # run as a script from this directory
+    from vehicle_page import (
+        USER_AGENT, VIEWPORT, STORAGE_STATE_FILE, block_assets, create_http_client,
+        fetch_vehicle_details, open_csv, scrape_vehicle_details
+    )
+
+# Vehicle pages scraped at the same time
+CONCURRENCY = 10
 
-def get_vehicle_links(page):
+# Vehicle links on the market page; they appear once the listing grid has rendered
+VEHICLE_LINK_SELECTOR = "#comp-lp1o159y a[href*='/vehicle-details/']"
+# Absolute, de-duplicated vehicle URLs of every matched link, read in one round-trip
+VEHICLE_URLS_JS = "els => [...new Set(els.map(e => e.href).filter(h => h.includes('/vehicle-details/')))]"
+
+async def get_vehicle_links(page):
     """Get all vehicle links from the market page"""
     try:
-        page.goto("https://www.theclassicvaluer.com/the-market")
-        page.wait_for_timeout(5000)
-        
-        # All <a> tags inside section
-        a_tags = page.locator('#comp-lp1o159y a')
-        count = a_tags.count()
-        vehicle_links = []
+        await page.goto("https://www.theclassicvaluer.com/the-market", wait_until="domcontentloaded")
+        await page.wait_for_selector(VEHICLE_LINK_SELECTOR, timeout=10000)
         
-        for i in range(count):
-            href = a_tags.nth(i).get_attribute('href')
-            if href and "/vehicle-details/" in href:
-                # Ensure full URL
-                if href.startswith("/"):
-                    href = f"https://www.theclassicvaluer.com{href}"
-                elif href.startswith("http") and "vehicle-details" in href:
-                    pass
-                else:
-                    continue
-                vehicle_links.append(href)
+        # Vehicle <a> tags inside section; e.href is already absolute
+        vehicle_links = await page.eval_on_selector_all(VEHICLE_LINK_SELECTOR, VEHICLE_URLS_JS)
         
         return vehicle_links
     
@@ -156,38 +37,31 @@ def get_vehicle_links(page):
         print(f"Error getting vehicle links: {e}")
         return []
 
-def save_to_csv(data, filename):
-    """Save data to CSV file"""
-    if not data:
-        print("No data to save")
-        return
-    
-    fieldnames = [
-        "Make", "Model", "Production Year", "Date of Sale", "Sold Price", 
-        "Gearbox", "Description", "Auction House", "Country of Sale", 
-        "Spyder", "LHD_RHD", "URL"
-    ]
-    
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data)
-    
-    print(f"✅ Data saved to {filename}")
-
-def main():
+async def main():
     """Main function to orchestrate the scraping process"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     csv_filename = f"vehicle_data_{timestamp}.csv"
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        page = browser.new_page()
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=False)
+        context = await browser.new_context(
+            user_agent=USER_AGENT,
+            viewport=VIEWPORT,
+            storage_state=STORAGE_STATE_FILE if os.path.exists(STORAGE_STATE_FILE) else None
+        )
+        await context.route("**/*", block_assets)
+        page = await context.new_page()
+        
+        # Vehicle pages go over plain HTTP when possible, the browser is only for the market page
+        client = create_http_client()
+        
+        csvfile, writer = open_csv(csv_filename)
         
         try:
             # Get all vehicle links
             print("🔍 Getting vehicle links from the market page...")
-            vehicle_links = get_vehicle_links(page)
+            vehicle_links = await get_vehicle_links(page)
+            await context.storage_state(path=STORAGE_STATE_FILE)
             
             if not vehicle_links:
                 print("❌ No vehicle links found!")
@@ -198,25 +72,41 @@ def main():
             # Initialize data storage
             all_vehicle_data = []
             
-            # Scrape each vehicle
-            for i, link in enumerate(vehicle_links, 1):
-                print(f"\n📄 Scraping vehicle {i}/{len(vehicle_links)}: {link}")
-                
-                vehicle_data = scrape_vehicle_details(page, link)
-                
-                if vehicle_data:
-                    all_vehicle_data.append(vehicle_data)
+            # Scrape vehicles concurrently, at most CONCURRENCY pages at a time
+            semaphore = asyncio.Semaphore(CONCURRENCY)
+            
+            async def scrape_link(i, link):
+                async with semaphore:
+                    print(f"\n📄 Scraping vehicle {i}/{len(vehicle_links)}: {link}")
                     
-                    # Print scraped data
-                    print(f"✅ {vehicle_data['Make']} {vehicle_data['Model']} ({vehicle_data['Production Year']}) - {vehicle_data['Sold Price']}")
+                    vehicle_data = await fetch_vehicle_details(client, link) if client else None
+                    if vehicle_data is None:
+                        vehicle_page = await context.new_page()
+                        try:
+                            vehicle_data = await scrape_vehicle_details(vehicle_page, link)
+                        finally:
+                            await vehicle_page.close()
                     
-                    # Save after each successful scrape (incremental save)
-                    save_to_csv(all_vehicle_data, csv_filename)
-                else:
-                    print(f"❌ Failed to scrape data from {link}")
-                
-                # Small delay between requests to be respectful
-                time.sleep(2)
+                    if vehicle_data:
+                        all_vehicle_data.append(vehicle_data)
+                        
+                        # Print scraped data
+                        print(f"✅ {vehicle_data.make} {vehicle_data.model} ({vehicle_data.production_year}) - {vehicle_data.sold_price}")
+                        
+                        # Append the row as soon as it is scraped (incremental save)
+                        writer.writerow(vehicle_data.csv_row())
+                        csvfile.flush()
+                    else:
+                        print(f"❌ Failed to scrape data from {link}")
+            
+            results = await asyncio.gather(
+                *(scrape_link(i, link) for i, link in enumerate(vehicle_links, 1)),
+                return_exceptions=True
+            )
+            # One bad page shouldn't stop the rest, but its error still gets reported
+            for link, result in zip(vehicle_links, results):
+                if isinstance(result, BaseException):
+                    print(f"❌ Error scraping {link}: {result!r}")
             
             # Final summary
             print(f"\n🎉 Scraping completed!")
@@ -227,8 +117,11 @@ def main():
             print(f"❌ An error occurred: {e}")
         
         finally:
+            if client:
+                await client.aclose()
+            csvfile.close()
             input("\nPress Enter to close browser...")
-            browser.close()
+            await browser.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -1,200 +1,133 @@
-from playwright.sync_api import sync_playwright
-import csv
-import time
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+import asyncio
+import os
 from datetime import datetime
 
-def scrape_vehicle_details(page, url):
-    """Scrape individual vehicle details from a vehicle page"""
+try:
+    from theclassicvaluer.browser_pool import BrowserPool
+except ImportError:  # run as a script from this directory
+    from browser_pool import BrowserPool
+
+try:
+    from theclassicvaluer.vehicle_page import (
+        USER_AGENT, VIEWPORT, STORAGE_STATE_FILE, block_assets, create_http_client,
+        fetch_vehicle_details, open_csv, scrape_vehicle_details
+    )
+except ImportError:  # run as a script from this directory
+    from vehicle_page import (
+        USER_AGENT, VIEWPORT, STORAGE_STATE_FILE, block_assets, create_http_client,
+        fetch_vehicle_details, open_csv, scrape_vehicle_details
+    )
+
+# Vehicle pages scraped at the same time, spread over BROWSER_POOL_SIZE browsers
+CONCURRENCY = 10
+BROWSER_POOL_SIZE = 2
+# Browsers are replaced after this many pages or seconds to keep memory bounded
+MAX_PAGES_PER_BROWSER = 50
+MAX_BROWSER_AGE_SECONDS = 300
+
+# Vehicle links on the market page; they appear once the listing grid has rendered
+VEHICLE_LINK_SELECTOR = "#comp-lp1o159y a[href*='/vehicle-details/']"
+
+# How long to wait for a scroll to bring in more links before trying the Load More button
+SCROLL_LOAD_TIMEOUT = 5000
+
+# Possible selectors for the Load More button, tried in order
+LOAD_MORE_SELECTORS = [
+    # :has-text() is case-insensitive, one spelling covers all
+    "button:has-text('Load More')",
+    "a:has-text('Load More')",
+    "[data-testid*='load']",
+    "[class*='load']",
+    "button[class*='more']",
+    "a[class*='more']"
+]
+
+# Raw href attributes of every matched link, read in one round-trip
+HREFS_JS = "els => els.map(e => e.getAttribute('href'))"
+
+async def wait_for_more_links(page, previous_count, timeout=5000):
+    """Wait until more than previous_count vehicle links are on the page. False on timeout."""
     try:
-        page.goto(url)
-        page.wait_for_timeout(3000)  # Reduced timeout for efficiency
-        
-        # Scrape price range
-        price_range = ""
-        price_elements = page.locator("h2:has-text('£')").all()
-        if price_elements:
-            price_range = price_elements[0].text_content().strip()
-        
-        # Scrape title (year and make/model)
-        title = ""
-        title_elements = page.locator("h2").all()
-        for element in title_elements:
-            text = element.text_content().strip()
-            if text and not text.startswith('£'):
-                title = text
-                break
-        
-        # Parse title to extract year, make, and model
-        year = ""
-        make = ""
-        model = ""
-        if title:
-            parts = title.split()
-            if parts:
-                year = parts[0]  # First part should be year
-                if len(parts) > 1:
-                    make = parts[1]  # Second part should be make
-                if len(parts) > 2:
-                    model = " ".join(parts[2:])  # Rest is model
-        
-        # Scrape meta information (auction house, country, date, lot)
-        meta_info = ""
-        meta_elements = page.locator("p:has-text('•')").all()
-        if meta_elements:
-            meta_info = meta_elements[0].text_content().strip()
-        
-        # Parse meta information
-        auction_house = ""
-        country = ""
-        date_of_sale = ""
-        lot_number = ""
-        
-        if meta_info:
-            meta_parts = [part.strip() for part in meta_info.split('•')]
-            if len(meta_parts) >= 1:
-                auction_house = meta_parts[0]
-            if len(meta_parts) >= 2:
-                country = meta_parts[1]
-            if len(meta_parts) >= 3:
-                date_of_sale = meta_parts[2]
-            if len(meta_parts) >= 4:
-                lot_number = meta_parts[3]
-        
-        # Scrape technical details (Manual, mileage, RHD)
-        gearbox = ""
-        mileage = ""
-        lhd_rhd = ""
-        
-        # Look for specific technical details
-        manual_element = page.locator("p:has-text('Manual')").first
-        if manual_element.count() > 0:
-            gearbox = "Manual"
-        
-        # Also check for Automatic
-        automatic_element = page.locator("p:has-text('Automatic')").first
-        if automatic_element.count() > 0:
-            gearbox = "Automatic"
-        
-        miles_elements = page.locator("p:has-text('miles')").all()
-        for element in miles_elements:
-            text = element.text_content().strip()
-            if "miles" in text:
-                mileage = text
-                break
-        
-        rhd_element = page.locator("p:has-text('RHD')").first
-        if rhd_element.count() > 0:
-            lhd_rhd = "RHD"
-        
-        lhd_element = page.locator("p:has-text('LHD')").first
-        if lhd_element.count() > 0:
-            lhd_rhd = "LHD"
-        
-        # Scrape description (the long text paragraph)
-        description = ""
-        # Look for paragraphs with substantial text content
-        description_elements = page.locator("p").all()
-        for element in description_elements:
-            text = element.text_content().strip()
-            if len(text) > 100 and not "•" in text and not text.startswith("Manual") and not "miles" in text and not text in ["RHD", "LHD"]:
-                description = text
-                break
-        
-        # Determine if it's a Spyder (convertible/open-top)
-        spyder = ""
-        if "tourer" in description.lower() or "convertible" in description.lower() or "roadster" in description.lower() or "spyder" in description.lower():
-            spyder = "Yes"
-        else:
-            spyder = "No"
-        
-        # Return as dictionary for CSV export
-        return {
-            "Make": make,
-            "Model": model,
-            "Production Year": year,
-            "Date of Sale": date_of_sale,
-            "Sold Price": price_range,
-            "Gearbox": gearbox,
-            "Description": description,
-            "Auction House": auction_house,
-            "Country of Sale": country,
-            "Spyder": spyder,
-            "LHD_RHD": lhd_rhd,
-            "URL": url
-        }
-        
-    except Exception as e:
-        print(f"Error scraping {url}: {e}")
-        return None
+        await page.wait_for_function(
+            "([selector, count]) => document.querySelectorAll(selector).length > count",
+            arg=[VEHICLE_LINK_SELECTOR, previous_count],
+            timeout=timeout
+        )
+        return True
+    except PlaywrightTimeoutError:
+        return False
 
-def get_vehicle_links(page, load_more_clicks=5):
+async def get_vehicle_links(page, load_more_clicks=5):
     """Get all vehicle links from the market page with Load More functionality"""
     try:
         make = "Ferrari Coupe"
         model = "2004-2009"
         model = "F430"
         
-        page.goto("https://www.theclassicvaluer.com/the-market")
-        page.wait_for_timeout(5000)
+        await page.goto("https://www.theclassicvaluer.com/the-market", wait_until="domcontentloaded")
+        await page.wait_for_selector(VEHICLE_LINK_SELECTOR, timeout=10000)
         
         vehicle_links = set()  # Use set to avoid duplicates
+        winning_selector = None  # Load More selector that last clicked successfully
+        scroll_loads_more = True  # Cleared once scrolling fails where the button works
         
         # Click "Load More" button multiple times
         for click_count in range(load_more_clicks + 1):  # +1 to include initial load
             if click_count > 0:
-                print(f"🔄 Clicking 'Load More' button ({click_count}/{load_more_clicks})...")
-                
-                # Try different possible selectors for Load More button
-                load_more_selectors = [
-                    "button:has-text('Load More')",
-                    "button:has-text('load more')",
-                    "button:has-text('LOAD MORE')",
-                    "a:has-text('Load More')",
-                    "a:has-text('load more')",
-                    "a:has-text('LOAD MORE')",
-                    "[data-testid*='load']",
-                    "[class*='load']",
-                    "button[class*='more']",
-                    "a[class*='more']"
-                ]
+                print(f"🔄 Loading more vehicles ({click_count}/{load_more_clicks})...")
+                # Links read at the end of the previous step; nothing loads between then and now
+                links_before = len(hrefs)
                 
-                load_more_clicked = False
-                for selector in load_more_selectors:
-                    load_more_button = page.locator(selector).first
-                    if load_more_button.count() > 0:
-                        try:
-                            # Scroll to the button first
-                            load_more_button.scroll_into_view_if_needed()
-                            page.wait_for_timeout(1000)
-                            
-                            # Click the button
-                            load_more_button.click()
-                            load_more_clicked = True
-                            print(f"✅ Load More button clicked using selector: {selector}")
-                            
-                            # Wait for new content to load
-                            page.wait_for_timeout(3000)
-                            break
-                        except Exception as e:
-                            print(f"❌ Failed to click Load More with selector {selector}: {e}")
-                            continue
+                # The list may load more on scroll; that is one JS call, so try it before the button
+                loaded_by_scroll = False
+                if scroll_loads_more:
+                    await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                    loaded_by_scroll = await wait_for_more_links(page, links_before, timeout=SCROLL_LOAD_TIMEOUT)
                 
-                if not load_more_clicked:
-                    print(f"⚠️ Could not find or click Load More button on attempt {click_count}")
-                    # Try scrolling to bottom to trigger lazy loading
-                    page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                    page.wait_for_timeout(2000)
+                if loaded_by_scroll:
+                    print("✅ More vehicles loaded by scrolling")
+                else:
+                    # The selector that worked last time goes first, the rest are only probed if it fails
+                    load_more_selectors = [s for s in LOAD_MORE_SELECTORS if s != winning_selector]
+                    if winning_selector:
+                        load_more_selectors.insert(0, winning_selector)
+                    
+                    load_more_clicked = False
+                    for selector in load_more_selectors:
+                        load_more_button = page.locator(selector).first
+                        if await load_more_button.count() > 0:
+                            try:
+                                # Scroll to the button first
+                                await load_more_button.scroll_into_view_if_needed()
+                                
+                                # Click the button
+                                await load_more_button.click()
+                                load_more_clicked = True
+                                winning_selector = selector
+                                print(f"✅ Load More button clicked using selector: {selector}")
+                                
+                                # Wait for new content to load
+                                await wait_for_more_links(page, links_before)
+                                break
+                            except Exception as e:
+                                print(f"❌ Failed to click Load More with selector {selector}: {e}")
+                                continue
+                    
+                    if load_more_clicked:
+                        # Scrolling didn't load anything but the button did, so skip the scroll from now on
+                        scroll_loads_more = False
+                    else:
+                        print(f"⚠️ Could not load more vehicles on attempt {click_count}")
             
             # Collect all vehicle links after each load
             print(f"📊 Collecting vehicle links (attempt {click_count + 1})...")
             
-            # All <a> tags inside section
-            a_tags = page.locator('#comp-lp1o159y a')
-            count = a_tags.count()
+            # Vehicle <a> tags inside section
+            hrefs = await page.eval_on_selector_all(VEHICLE_LINK_SELECTOR, HREFS_JS)
             
             current_links = 0
-            for i in range(count):
-                href = a_tags.nth(i).get_attribute('href')
+            for href in hrefs:
                 if href and "/vehicle-details/" in href:
                     # Ensure full URL
                     if href.startswith("/"):
@@ -222,39 +155,91 @@ def get_vehicle_links(page, load_more_clicks=5):
         print(f"Error getting vehicle links: {e}")
         return []
 
-def save_to_csv(data, filename):
-    """Save data to CSV file"""
-    if not data:
-        print("No data to save")
-        return
+def create_browser_pool(p, size=BROWSER_POOL_SIZE, headless=False):
+    """Browser pool with the scraper's context settings; call .start() on it"""
+    return BrowserPool(
+        p,
+        size=size,
+        pages_per_browser=max(1, CONCURRENCY // size),
+        max_pages_per_browser=MAX_PAGES_PER_BROWSER,
+        max_age_seconds=MAX_BROWSER_AGE_SECONDS,
+        headless=headless,
+        context_options={
+            "user_agent": USER_AGENT,
+            "viewport": VIEWPORT,
+            "storage_state": STORAGE_STATE_FILE if os.path.exists(STORAGE_STATE_FILE) else None
+        },
+        route_handler=block_assets
+    )
+
+async def scrape_links(vehicle_links, pool, client, csvfile, writer):
+    """Scrape every link into the CSV, returns how many vehicles were saved"""
+    scraped = 0
     
-    fieldnames = [
-        "Make", "Model", "Production Year", "Date of Sale", "Sold Price", 
-        "Gearbox", "Description", "Auction House", "Country of Sale", 
-        "Spyder", "LHD_RHD", "URL"
-    ]
+    # Scrape vehicles concurrently, at most CONCURRENCY at a time; only pages
+    # that need rendering take a browser page from the pool
+    semaphore = asyncio.Semaphore(CONCURRENCY)
     
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data)
+    async def scrape_link(i, link):
+        nonlocal scraped
+        async with semaphore:
+            print(f"\n📄 Scraping vehicle {i}/{len(vehicle_links)}: {link}")
+            
+            vehicle_data = await fetch_vehicle_details(client, link) if client else None
+            if vehicle_data is None:
+                async with pool.acquire() as inst:
+                    vehicle_page = await inst.context.new_page()
+                    try:
+                        vehicle_data = await scrape_vehicle_details(vehicle_page, link)
+                    finally:
+                        await vehicle_page.close()
+            
+            if vehicle_data:
+                scraped += 1
+                
+                # Print scraped data
+                print(f"✅ {vehicle_data.make} {vehicle_data.model} ({vehicle_data.production_year}) - {vehicle_data.sold_price}")
+                
+                # Append the row as soon as it is scraped (incremental save)
+                writer.writerow(vehicle_data.csv_row())
+                csvfile.flush()
+            else:
+                print(f"❌ Failed to scrape data from {link}")
     
-    print(f"✅ Data saved to {filename}")
+    results = await asyncio.gather(
+        *(scrape_link(i, link) for i, link in enumerate(vehicle_links, 1)),
+        return_exceptions=True
+    )
+    # One bad page shouldn't stop the rest, but its error still gets reported
+    for link, result in zip(vehicle_links, results):
+        if isinstance(result, BaseException):
+            print(f"❌ Error scraping {link}: {result!r}")
+    return scraped
 
-def main():
+async def main():
     """Main function to orchestrate the scraping process"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     csv_filename = f"vehicle_data_{timestamp}.csv"
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        page = browser.new_page()
+    async with async_playwright() as p:
+        pool = await create_browser_pool(p).start()
+        
+        # Vehicle pages go over plain HTTP when possible, the browser is only for the market page
+        client = create_http_client()
+        
+        csvfile, writer = open_csv(csv_filename)
         
         try:
             # Get all vehicle links with Load More functionality
             print("🔍 Getting vehicle links from the market page...")
             print("🔄 Will click 'Load More' button 5 times to get more vehicles...")
-            vehicle_links = get_vehicle_links(page, load_more_clicks=5)
+            async with pool.acquire() as inst:
+                page = await inst.context.new_page()
+                try:
+                    vehicle_links = await get_vehicle_links(page, load_more_clicks=5)
+                    await inst.context.storage_state(path=STORAGE_STATE_FILE)
+                finally:
+                    await page.close()
             
             if not vehicle_links:
                 print("❌ No vehicle links found!")
@@ -262,40 +247,22 @@ def main():
             
             print(f"🚗 Found {len(vehicle_links)} total vehicle links after loading more content")
             
-            # Initialize data storage
-            all_vehicle_data = []
-            
-            # Scrape each vehicle
-            for i, link in enumerate(vehicle_links, 1):
-                print(f"\n📄 Scraping vehicle {i}/{len(vehicle_links)}: {link}")
-                
-                vehicle_data = scrape_vehicle_details(page, link)
-                
-                if vehicle_data:
-                    all_vehicle_data.append(vehicle_data)
-                    
-                    # Print scraped data
-                    print(f"✅ {vehicle_data['Make']} {vehicle_data['Model']} ({vehicle_data['Production Year']}) - {vehicle_data['Sold Price']}")
-                    
-                    # Save after each successful scrape (incremental save)
-                    save_to_csv(all_vehicle_data, csv_filename)
-                else:
-                    print(f"❌ Failed to scrape data from {link}")
-                
-                # Small delay between requests to be respectful
-                time.sleep(2)
+            scraped = await scrape_links(vehicle_links, pool, client, csvfile, writer)
             
             # Final summary
             print(f"\n🎉 Scraping completed!")
-            print(f"📊 Successfully scraped {len(all_vehicle_data)} vehicles out of {len(vehicle_links)} total")
+            print(f"📊 Successfully scraped {scraped} vehicles out of {len(vehicle_links)} total")
             print(f"💾 Data saved to: {csv_filename}")
             
         except Exception as e:
             print(f"❌ An error occurred: {e}")
         
         finally:
+            if client:
+                await client.aclose()
+            csvfile.close()
             input("\nPress Enter to close browser...")
-            browser.close()
+            await pool.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
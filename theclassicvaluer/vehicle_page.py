@@ -0,0 +1,228 @@
+import csv
+import re
+from dataclasses import dataclass
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # lets httpx speak HTTP/2
+except ImportError:
+    h2 = None
+
+try:
+    from theclassicvaluer.rate_limit import DomainLimiter
+except ImportError:  # run as a script from this directory
+    from rate_limit import DomainLimiter
+
+# Politeness limit for vehicle page requests; backs off on its own if the site returns 429/503
+REQUESTS_PER_SECOND = 5
+domain_limiter = DomainLimiter(rps=REQUESTS_PER_SECOND)
+
+# Browser contexts are created with these settings
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+VIEWPORT = {"width": 1920, "height": 1080}
+# Cookies and local storage from the last run, so new contexts start warm
+STORAGE_STATE_FILE = "tcv_state.json"
+
+# Vehicle pages are fetched over plain HTTP when httpx and selectolax are installed
+HTTP_HEADERS = {"User-Agent": USER_AGENT}
+HTTP_TIMEOUT = 15
+HTTP_MAX_CONNECTIONS = 20
+# Every request goes to one host, so a few long-lived (multiplexed with h2) connections carry them all
+HTTP_MAX_KEEPALIVE = 4
+HTTP_KEEPALIVE_EXPIRY = 60
+
+# CSV columns, in the order of Vehicle.csv_row()
+FIELDNAMES = [
+    "Make", "Model", "Production Year", "Date of Sale", "Sold Price",
+    "Gearbox", "Description", "Auction House", "Country of Sale",
+    "Spyder", "LHD_RHD", "URL"
+]
+
+# Paragraphs that are not the description: meta line, mileage, gearbox and steering labels.
+# Also used as a JS regex literal in VEHICLE_DETAILS_JS, so keep it to syntax both accept.
+SKIP_DESCRIPTION_RE = re.compile(r"^Manual|•|miles|^(?:RHD|LHD)$")
+# Open-top body styles mentioned in the description
+SPYDER_RE = re.compile(r"tourer|convertible|roadster|spyder", re.IGNORECASE)
+
+# Only h2/p text is read, so these are never downloaded
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media", "stylesheet"}
+BLOCKED_URL_PARTS = ("google-analytics", "googletagmanager", "doubleclick", "hotjar", "facebook.net")
+
+async def block_assets(route):
+    """Abort asset and analytics requests, let everything else through"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(part in request.url for part in BLOCKED_URL_PARTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+# The price heading is in the DOM; a plain h2 walk instead of the :has-text() selector engine
+PRICE_READY_JS = "() => [...document.querySelectorAll('h2')].some(e => e.textContent.includes('£'))"
+
+# Everything scrape_vehicle_details reads from a vehicle page, gathered in one evaluate call.
+# Text checks mirror the old :has-text() locators (case-insensitive substring matches).
+VEHICLE_DETAILS_JS = """() => {
+    const h2s = [...document.querySelectorAll('h2')].map(e => e.textContent.trim());
+    const ps = [...document.querySelectorAll('p')].map(e => e.textContent.trim());
+    const psLower = ps.map(t => t.toLowerCase());
+    const anyP = (word) => psLower.some(t => t.includes(word));
+    return {
+        price: h2s.find(t => t.includes('£')) || '',
+        title: h2s.find(t => t && !t.startsWith('£')) || '',
+        meta: ps.find(t => t.includes('•')) || '',
+        gearbox: anyP('automatic') ? 'Automatic' : (anyP('manual') ? 'Manual' : ''),
+        mileage: ps.find(t => t.includes('miles')) || '',
+        lhd_rhd: anyP('lhd') ? 'LHD' : (anyP('rhd') ? 'RHD' : ''),
+        // Length first, so short paragraphs never reach the regex; only the match is returned
+        description: ps.find(t => t.length > 100 && !/""" + SKIP_DESCRIPTION_RE.pattern + """/.test(t)) || ''
+    };
+}"""
+
+@dataclass(slots=True)
+class Vehicle:
+    """One scraped vehicle page, fields in FIELDNAMES order"""
+    make: str = ""
+    model: str = ""
+    production_year: str = ""
+    date_of_sale: str = ""
+    sold_price: str = ""
+    gearbox: str = ""
+    description: str = ""
+    auction_house: str = ""
+    country_of_sale: str = ""
+    spyder: str = "No"
+    lhd_rhd: str = ""
+    url: str = ""
+
+    @classmethod
+    def from_dom(cls, data, url):
+        """Build from the raw page fields (see VEHICLE_DETAILS_JS)"""
+        # Title is "<year> <make> <model...>"
+        title_parts = data["title"].split()
+        year = title_parts[0] if title_parts else ""
+        make = title_parts[1] if len(title_parts) > 1 else ""
+        model = " ".join(title_parts[2:])
+
+        # Meta is "<auction house> • <country> • <date> • <lot>"
+        meta_parts = [part.strip() for part in data["meta"].split("•")] + ["", ""]
+
+        description = data["description"]
+        return cls(
+            make=make,
+            model=model,
+            production_year=year,
+            date_of_sale=meta_parts[2],
+            sold_price=data["price"],
+            gearbox=data["gearbox"],
+            description=description,
+            auction_house=meta_parts[0],
+            country_of_sale=meta_parts[1],
+            # Open-top body styles count as Spyder
+            spyder="Yes" if SPYDER_RE.search(description) else "No",
+            lhd_rhd=data["lhd_rhd"],
+            url=url
+        )
+
+    def csv_row(self):
+        """Field values in FIELDNAMES order"""
+        return (
+            self.make, self.model, self.production_year, self.date_of_sale, self.sold_price,
+            self.gearbox, self.description, self.auction_house, self.country_of_sale,
+            self.spyder, self.lhd_rhd, self.url
+        )
+
+def vehicle_fields_from_html(html):
+    """The same fields VEHICLE_DETAILS_JS reads, taken from server-rendered HTML"""
+    tree = HTMLParser(html)
+    # .text().strip() matches textContent.trim() in the browser
+    h2s = [node.text().strip() for node in tree.css("h2")]
+    ps = [node.text().strip() for node in tree.css("p")]
+    ps_lower = [text.lower() for text in ps]
+
+    def first(texts, test):
+        return next((text for text in texts if test(text)), "")
+
+    def any_p(word):
+        return any(word in text for text in ps_lower)
+
+    return {
+        "price": first(h2s, lambda t: "£" in t),
+        "title": first(h2s, lambda t: t and not t.startswith("£")),
+        "meta": first(ps, lambda t: "•" in t),
+        "gearbox": "Automatic" if any_p("automatic") else "Manual" if any_p("manual") else "",
+        "mileage": first(ps, lambda t: "miles" in t),
+        "lhd_rhd": "LHD" if any_p("lhd") else "RHD" if any_p("rhd") else "",
+        "description": first(ps, lambda t: len(t) > 100 and not SKIP_DESCRIPTION_RE.search(t))
+    }
+
+async def fetch_vehicle_details(client, url):
+    """Scrape a vehicle page without a browser. None when the page has to be rendered instead."""
+    try:
+        await domain_limiter.wait(url)
+        response = await client.get(url)
+        domain_limiter.record(url, response.status_code)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        print(f"⚠️ Could not fetch {url} over HTTP ({e}), using the browser")
+        return None
+
+    data = vehicle_fields_from_html(response.text)
+    if not data["price"]:
+        # Price is rendered client-side on this page
+        return None
+    return Vehicle.from_dom(data, url)
+
+async def scrape_vehicle_details(page, url):
+    """Scrape individual vehicle details from a vehicle page"""
+    try:
+        await domain_limiter.wait(url)
+        response = await page.goto(url, wait_until="domcontentloaded")
+        domain_limiter.record(url, response.status if response else None)
+
+        # The price heading is read first, so stop waiting as soon as it is in the DOM
+        try:
+            await page.wait_for_function(PRICE_READY_JS, timeout=8000)
+        except PlaywrightTimeoutError:
+            print(f"⚠️ No price heading on {url} after 8s, scraping what is there")
+
+        # Read every field in one round-trip instead of a locator query per field
+        data = await page.evaluate(VEHICLE_DETAILS_JS)
+        return Vehicle.from_dom(data, url)
+
+    except Exception as e:
+        print(f"Error scraping {url}: {e}")
+        return None
+
+def open_csv(filename):
+    """Create the CSV with its header row; rows are appended as vehicles are scraped"""
+    csvfile = open(filename, 'w', newline='', encoding='utf-8')
+    writer = csv.writer(csvfile)
+    writer.writerow(FIELDNAMES)
+    return csvfile, writer
+
+def create_http_client():
+    """Shared client for vehicle pages, or None when httpx/selectolax aren't installed"""
+    if httpx is None or HTMLParser is None:
+        return None
+    return httpx.AsyncClient(
+        headers=HTTP_HEADERS,
+        follow_redirects=True,
+        timeout=HTTP_TIMEOUT,
+        http2=h2 is not None,
+        limits=httpx.Limits(
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            max_connections=HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+        )
+    )